@@ -1,11 +1,21 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import students, courses, enrollments
-from app.core.config import API_V1_STR
+from app.api.async_routes import async_router
+from app.api.endpoints import students, courses, enrollments, export, imports, search, stats, waitlist
+from app.core.config import API_V1_STR, DB_MODE
 
 api_router = APIRouter()
 
+def _router(router: APIRouter) -> APIRouter:
+    # 異步模式下使用異步版本的端點
+    return async_router(router) if DB_MODE == "async" else router
+
 # 子路由
-api_router.include_router(students.router, prefix="/students", tags=["學生管理"])
-api_router.include_router(courses.router, prefix="/courses", tags=["課程管理"])
-api_router.include_router(enrollments.router, prefix="/enrollments", tags=["選課管理"]) 
\ No newline at end of file
+api_router.include_router(_router(students.router), prefix="/students", tags=["學生管理"])
+api_router.include_router(_router(courses.router), prefix="/courses", tags=["課程管理"])
+api_router.include_router(_router(enrollments.router), prefix="/enrollments", tags=["選課管理"])
+api_router.include_router(_router(waitlist.router), prefix="/waitlist", tags=["候補名單"])
+api_router.include_router(export.router, prefix="/export", tags=["數據導出"])
+api_router.include_router(imports.router, prefix="/import", tags=["數據導入"])
+api_router.include_router(search.router, prefix="/search", tags=["搜索"])
+api_router.include_router(_router(stats.router), prefix="/stats", tags=["統計"])
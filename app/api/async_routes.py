@@ -0,0 +1,69 @@
+import inspect
+from typing import Any, Callable
+
+from fastapi import APIRouter, Depends, params
+from fastapi.routing import APIRoute
+
+from app.api import deps
+from app.db.storage import retry_on_busy_async
+
+# 同步端點中需要替換為異步會話的依賴
+SESSION_DEPENDENCIES = {deps.get_db, deps.get_read_db, deps.get_write_db}
+
+def _is_session_param(parameter: inspect.Parameter) -> bool:
+    return isinstance(parameter.default, params.Depends) and parameter.default.dependency in SESSION_DEPENDENCIES
+
+def async_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    將同步端點包裝為異步端點
+
+    會話依賴替換為 AsyncSession，原有處理邏輯通過 AsyncSession.run_sync 在事件循環上執行，
+    數據庫 I/O 由異步驅動完成，不再佔用線程池中的線程
+    """
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    # 帶 retry_on_busy 的端點改為在此處異步重試，避免 time.sleep 阻塞事件循環
+    retried = getattr(endpoint, "busy_retry_endpoint", None)
+    target = retried or endpoint
+
+    signature = inspect.signature(endpoint)
+    session_params = [name for name, parameter in signature.parameters.items() if _is_session_param(parameter)]
+    parameters = [
+        parameter.replace(default=Depends(deps.get_async_db), annotation=AsyncSession)
+        if name in session_params else parameter
+        for name, parameter in signature.parameters.items()
+    ]
+
+    async def wrapper(**kwargs: Any) -> Any:
+        sessions = {name: kwargs.pop(name) for name in session_params}
+        async_session = next(iter(sessions.values()))
+        call = lambda: async_session.run_sync(
+            lambda sync_session: target(**kwargs, **{name: sync_session for name in sessions})
+        )
+        if retried is None:
+            return await call()
+        return await retry_on_busy_async(endpoint.__name__, call, async_session.rollback)
+
+    wrapper.__signature__ = signature.replace(parameters=parameters)
+    wrapper.__name__ = endpoint.__name__
+    wrapper.__doc__ = endpoint.__doc__
+    return wrapper
+
+def async_router(router: APIRouter) -> APIRouter:
+    """
+    根據同步路由生成路徑、參數與響應模型完全一致的異步路由
+    """
+    mirrored = APIRouter()
+    for route in router.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        mirrored.add_api_route(
+            route.path,
+            async_endpoint(route.endpoint),
+            methods=list(route.methods),
+            response_model=route.response_model,
+            status_code=route.status_code,
+            response_class=route.response_class,
+            name=route.name,
+        )
+    return mirrored
@@ -1,8 +1,14 @@
-from typing import Generator
-from fastapi import Depends, HTTPException, status
+import time
+from typing import TYPE_CHECKING, AsyncGenerator, Generator
+from fastapi import Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 
-from app.db.database import SessionLocal
+from app.core.config import READ_YOUR_WRITES_WINDOW
+from app.db import database
+from app.db.database import ReadSessionLocal, SessionLocal
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 # 數據庫依賴
 def get_db() -> Generator[Session, None, None]:
@@ -10,4 +16,45 @@ def get_db() -> Generator[Session, None, None]:
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+# 寫入後一段時間內讓同一客戶端的讀請求走主庫，值為截止時間戳
+READ_YOUR_WRITES_COOKIE = "read_primary_until"
+
+def _reads_from_primary(request: Request) -> bool:
+    if not database.read_replica or READ_YOUR_WRITES_WINDOW <= 0:
+        return False
+    try:
+        return float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+# 讀請求依賴：使用只讀連接池（或只讀副本），客戶端剛寫入過時改用主庫
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    db = (SessionLocal if _reads_from_primary(request) else ReadSessionLocal)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# 寫請求依賴：使用寫連接池，讀寫分離到副本時標記客戶端在窗口期內從主庫讀取
+def get_write_db(response: Response) -> Generator[Session, None, None]:
+    if database.read_replica and READ_YOUR_WRITES_WINDOW > 0:
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE,
+            str(time.time() + READ_YOUR_WRITES_WINDOW),
+            max_age=int(READ_YOUR_WRITES_WINDOW) + 1,
+            httponly=True,
+        )
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# 異步數據庫依賴（DB_MODE=async 時使用）
+async def get_async_db() -> AsyncGenerator["AsyncSession", None]:
+    if database.AsyncSessionLocal is None:
+        raise RuntimeError("異步數據庫未啟用，請設置 DB_MODE=async")
+    async with database.AsyncSessionLocal() as db:
+        yield db
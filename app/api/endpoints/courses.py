@@ -1,17 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import Any, List
+from pydantic import TypeAdapter
+from typing import Any, Callable, List, Optional
 
-from app.api import deps
+from app.api import deps, fast_read
+from app.api.fieldsets import FieldSet, field_set
+from app.api.filters import ListQuery, course_conditions, course_list_query, matching_ids
+from app.api.pagination import NEXT_CURSOR_HEADER, apply_cursor, order_by_columns, split_page
+from app.core.cache import course_cache, invalidate_course
+from app.core.singleflight import read_coalescer
+from app.db import deactivation
+from app.db.seats import apply_course_credits
+from app.db.storage import retry_on_busy
+from app.db.utils import unique_violation
+from app.db.waitlist import promotion_signal
 from app.models.models import Course
+from app.schemas.deactivation import CourseDeactivate, DeactivationResult
 from app.schemas.course import CourseCreate, CourseUpdate, Course as CourseSchema
 
 router = APIRouter()
 
+courses_table = Course.__table__
+
+# fields= 查詢參數，按課程響應模式校驗
+course_fields = field_set(CourseSchema)
+
+# 唯一索引衝突對應的錯誤信息
+COURSE_UNIQUE_MESSAGES = {
+    "course_code": "該課程代碼已被其他課程使用",
+}
+
 @router.post("/", response_model=CourseSchema, status_code=status.HTTP_201_CREATED)
+@retry_on_busy
 def create_course(
     course_in: CourseCreate,
-    db: Session = Depends(deps.get_db)
+    db: Session = Depends(deps.get_write_db)
 ) -> Any:
     """
     創建新課程
@@ -36,78 +61,203 @@ def create_course(
     db.add(db_course)
     db.commit()
     db.refresh(db_course)
+    invalidate_course()
     return db_course
 
+_course_adapter = TypeAdapter(CourseSchema)
+_course_list_adapter = TypeAdapter(List[CourseSchema])
+
+def _to_json(adapter: TypeAdapter, value: Any) -> bytes:
+    # 先從 ORM 對象校驗出響應模式再序列化，保證欄位及順序與 response_model 一致
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+def _cached_json(key: tuple, produce: Callable[[], tuple]) -> Response:
+    """
+    返回快取中已序列化的響應，未命中時生成 (響應體, 響應頭) 並寫入快取；相同的並發請求只生成一次
+    """
+    cached = course_cache.get(key)
+    if cached is None:
+        # 生成期間若有課程寫入使快取失效，生成的響應可能是舊數據，只返回不寫入快取
+        generation = course_cache.generation
+        cached = read_coalescer.do(key, produce)
+        course_cache.set(key, cached, generation)
+    body, headers = cached
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @router.get("/", response_model=List[CourseSchema])
 def read_courses(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(deps.get_db)
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1),
+    cursor: Optional[str] = None,
+    query: ListQuery = Depends(course_list_query),
+    fieldset: Optional[FieldSet] = Depends(course_fields),
+    db: Session = Depends(deps.get_read_db)
 ) -> Any:
     """
     獲取所有課程
+
+    可按啟用狀態、學分範圍、課程代碼前綴、課程名稱前綴過濾，sort 指定排序欄位（前綴 - 表示降序），fields 指定返回的欄位。
+    傳入 cursor（首頁傳空字符串）時使用游標分頁，下一頁游標通過 X-Next-Cursor 響應頭返回
     """
-    courses = db.query(Course).offset(skip).limit(limit).all()
-    return courses
+    def produce() -> tuple:
+        headers = {}
+        fast = fast_read.enabled or fieldset is not None
+        if fieldset is not None:
+            # 只查詢請求的欄位（以及分頁所需的 id、排序鍵）
+            stmt = fieldset.select(courses_table, Course.id, query.sort_column)
+            fetch = lambda stmt: db.execute(stmt).all()
+        elif fast:
+            # 快速讀取路徑：只查詢響應所需的列，不構建 ORM 對象
+            stmt = fast_read.select_schema(CourseSchema, Course.__table__)
+            fetch = lambda stmt: db.execute(stmt).all()
+        else:
+            stmt = select(Course)
+            fetch = lambda stmt: db.scalars(stmt).all()
+        stmt = query.apply(stmt)
+        if cursor is not None:
+            courses, next_cursor = split_page(
+                fetch(apply_cursor(stmt, cursor, limit, query.sort_column, Course.id, query.descending)),
+                limit, query.sort_column, Course.id
+            )
+            if next_cursor:
+                headers[NEXT_CURSOR_HEADER] = next_cursor
+        else:
+            stmt = stmt.order_by(*order_by_columns(query.sort_column, Course.id, query.descending))
+            courses = fetch(stmt.offset(skip).limit(limit))
+        if fieldset is not None:
+            return fieldset.dump(courses), headers
+        if fast:
+            return fast_read.dump_rows(CourseSchema, courses), headers
+        return _to_json(_course_list_adapter, courses), headers
+
+    key = ("courses", skip, limit, cursor, *query.key, fieldset.key if fieldset else None)
+    return _cached_json(key, produce)
 
 @router.get("/{course_id}", response_model=CourseSchema)
 def read_course(
     course_id: int,
-    db: Session = Depends(deps.get_db)
+    fieldset: Optional[FieldSet] = Depends(course_fields),
+    db: Session = Depends(deps.get_read_db)
 ) -> Any:
     """
-    根據ID獲取課程
+    根據ID獲取課程，fields 指定返回的欄位
     """
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="找不到該課程"
-        )
-    return course
+    if fieldset is not None:
+        # 部分欄位的單條查詢只是一次主鍵查找，不寫入快取（課程寫入只失效完整響應的快取鍵）
+        course = db.execute(fieldset.select(courses_table).where(courses_table.c.id == course_id)).first()
+        if course is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="找不到該課程"
+            )
+        return fast_read.FastJSONResponse(fieldset.to_dicts([course])[0])
+
+    def produce() -> tuple:
+        course = db.query(Course).filter(Course.id == course_id).first()
+        if not course:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="找不到該課程"
+            )
+        return _to_json(_course_adapter, course), {}
+
+    return _cached_json(("course", course_id), produce)
 
 @router.put("/{course_id}", response_model=CourseSchema)
+@retry_on_busy
 def update_course(
     course_id: int,
     course_in: CourseUpdate,
-    db: Session = Depends(deps.get_db)
+    db: Session = Depends(deps.get_write_db)
 ) -> Any:
     """
-    更新課程信息
+    更新課程信息（單條 UPDATE ... RETURNING，課程代碼衝突由唯一索引檢查）
     """
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
+    update_data = course_in.dict(exclude_unset=True)
+    if not update_data:
+        course = db.execute(select(courses_table).where(courses_table.c.id == course_id)).first()
+    else:
+        try:
+            # 學分變更時同步已選學生的學分負擔（按更新前的學分計算差值）
+            if "credits" in update_data:
+                apply_course_credits(db, course_id, update_data["credits"])
+            course = db.execute(
+                update(courses_table)
+                .where(courses_table.c.id == course_id)
+                .values(**update_data)
+                .returning(*courses_table.c)
+            ).first()
+            if course is None:
+                db.rollback()
+            else:
+                db.commit()
+        except IntegrityError as exc:
+            db.rollback()
+            detail = unique_violation(exc, COURSE_UNIQUE_MESSAGES)
+            if detail is None:
+                raise
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+    if course is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="找不到該課程"
         )
-    
-    # 更新字段
-    update_data = course_in.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(course, field, value)
-    
+    if update_data:
+        invalidate_course(course_id)
+    # 擴容或重新啟用後可能有空位，喚醒候補遞補
+    if "max_students" in update_data or update_data.get("is_active"):
+        promotion_signal.notify()
+    return course._asdict()
+
+@router.post("/deactivate", response_model=DeactivationResult)
+@retry_on_busy
+def deactivate_courses(
+    body: CourseDeactivate,
+    db: Session = Depends(deps.get_write_db)
+) -> Any:
+    """
+    批量停用課程（按ID列表或課程代碼、名稱前綴、學分範圍選取）
+
+    清空選課與候補記錄並扣減學生學分負擔，每批ID執行固定數量的集合操作，全部在同一事務中提交
+    """
+    conditions = course_conditions(body.course_code, body.title, body.credits_min, body.credits_max)
+    ids = matching_ids(db, Course.id, body.ids, conditions)
+    result = deactivation.deactivate_courses(db, ids)
     db.commit()
-    db.refresh(course)
-    return course
+    if ids:
+        course_cache.invalidate_prefix("course")
+        invalidate_course()
+    if result["enrollments_removed"]:
+        read_coalescer.forget("roster")
+    return {"matched": len(ids), **result}
 
 @router.delete("/{course_id}", response_model=CourseSchema)
+@retry_on_busy
 def delete_course(
     course_id: int,
-    db: Session = Depends(deps.get_db)
+    db: Session = Depends(deps.get_write_db)
 ) -> Any:
     """
     刪除課程
     """
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
+    # 執行軟刪除
+    course = db.execute(
+        update(courses_table)
+        .where(courses_table.c.id == course_id)
+        .values(is_active=False)
+        .returning(*courses_table.c)
+    ).first()
+    if course is None:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="找不到該課程"
         )
     
-    # 執行軟刪除
-    course.is_active = False
+    # 清空該課程的選課與候補記錄，扣減學生學分負擔
+    removed = deactivation.clear_course_enrollments(db, [course_id])
     db.commit()
-    db.refresh(course)
-    return course 
\ No newline at end of file
+    invalidate_course(course_id)
+    if removed["enrollments_removed"]:
+        read_coalescer.forget("roster")
+    return course._asdict()
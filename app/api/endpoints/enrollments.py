@@ -1,18 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import Any, List
+from typing import Any, List, Optional
 from datetime import datetime
 
-from app.api import deps
+from app.api import deps, fast_read
+from app.core.singleflight import read_coalescer
+from app.db.seats import adjust_credit_load, is_enrolled, release_seats, reserve_seat, reserve_seats
+from app.db.utils import chunked
+from app.db.storage import retry_on_busy
+from app.db.waitlist import promotion_signal
 from app.models.models import Student, Course, enrollment
-from app.schemas.enrollment import EnrollmentCreate, EnrollmentDelete, Enrollment as EnrollmentSchema
+from app.schemas.enrollment import (
+    EnrollmentCreate,
+    EnrollmentDelete,
+    Enrollment as EnrollmentSchema,
+    EnrollmentBatchCreate,
+    EnrollmentBatchDelete,
+    EnrollmentBatchResult,
+)
 
 router = APIRouter()
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
+@retry_on_busy
 def create_enrollment(
     enrollment_in: EnrollmentCreate,
-    db: Session = Depends(deps.get_db)
+    db: Session = Depends(deps.get_write_db)
 ) -> Any:
     """
     學生選課
@@ -34,106 +49,121 @@ def create_enrollment(
         )
     
     # 檢查是否已選課
-    for enrolled_course in student.courses:
-        if enrolled_course.id == enrollment_in.course_id:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="學生已選修該課程"
-            )
+    if is_enrolled(db, student.id, course.id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="學生已選修該課程"
+        )
     
-    # 檢查課程人數是否已滿
-    if len(course.students) >= course.max_students:
+    # 原子地佔用名額，名額不足時條件更新不會生效
+    if not reserve_seat(db, course.id):
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="課程人數已滿"
         )
     
     # 選課操作
-    student.courses.append(course)
-    db.commit()
+    enrollment_date = datetime.now()
+    try:
+        db.execute(enrollment.insert().values(
+            student_id=student.id,
+            course_id=course.id,
+            enrollment_date=enrollment_date,
+            is_active=True
+        ))
+        adjust_credit_load(db, [(student.id, course.id)])
+        db.commit()
+        read_coalescer.forget("roster")
+    except IntegrityError:
+        # 並發請求已搶先寫入同一選課記錄，回滾會同時撤銷名額佔用
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="學生已選修該課程"
+        )
     
     # 組裝返回數據
     result = {
         "student_id": student.id,
         "course_id": course.id,
-        "enrollment_date": datetime.now(),
+        "enrollment_date": enrollment_date,
         "is_active": True
     }
     
     return result
 
+def _enrollment_rows(db: Session, where, order_by, skip: int, limit: Optional[int], is_active: Optional[bool]) -> List[Any]:
+    """
+    以單條查詢讀取選課記錄，列的順序與響應模式一致
+    """
+    stmt = select(
+        enrollment.c.student_id,
+        enrollment.c.course_id,
+        enrollment.c.enrollment_date,
+        enrollment.c.is_active,
+    ).where(where)
+    if is_active is not None:
+        stmt = stmt.where(enrollment.c.is_active == is_active)
+    stmt = stmt.order_by(order_by).offset(skip)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return db.execute(stmt).all()
+
+def _list_enrollments(db: Session, where, order_by, skip: int, limit: Optional[int], is_active: Optional[bool]) -> List[dict]:
+    return [row._asdict() for row in _enrollment_rows(db, where, order_by, skip, limit, is_active)]
+
 @router.get("/students/{student_id}/courses", response_model=List[EnrollmentSchema])
 def read_student_enrollments(
     student_id: int,
-    db: Session = Depends(deps.get_db)
+    skip: int = 0,
+    limit: Optional[int] = None,
+    is_active: Optional[bool] = None,
+    db: Session = Depends(deps.get_read_db)
 ) -> Any:
     """
     獲取學生選課記錄
     """
-    student = db.query(Student).filter(Student.id == student_id).first()
-    if not student:
+    if db.scalar(select(Student.id).where(Student.id == student_id)) is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="找不到該學生"
         )
     
-    # 獲取選課記錄
-    enrollments = []
-    for course in student.courses:
-        # 獲取選課表中的記錄
-        stmt = enrollment.select().where(
-            enrollment.c.student_id == student_id,
-            enrollment.c.course_id == course.id
-        )
-        enrollment_record = db.execute(stmt).first()
-        
-        enrollments.append({
-            "student_id": student_id,
-            "course_id": course.id,
-            "enrollment_date": enrollment_record.enrollment_date,
-            "is_active": enrollment_record.is_active
-        })
-    
-    return enrollments
+    return _list_enrollments(
+        db, enrollment.c.student_id == student_id, enrollment.c.course_id, skip, limit, is_active
+    )
 
 @router.get("/courses/{course_id}/students", response_model=List[EnrollmentSchema])
 def read_course_enrollments(
     course_id: int,
-    db: Session = Depends(deps.get_db)
+    skip: int = 0,
+    limit: Optional[int] = None,
+    is_active: Optional[bool] = None,
+    db: Session = Depends(deps.get_read_db)
 ) -> Any:
     """
-    獲取課程選課記錄
+    獲取課程選課記錄（相同的並發請求共享一次查詢）
     """
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="找不到該課程"
-        )
-    
-    # 獲取選課記錄
-    enrollments = []
-    for student in course.students:
-        # 獲取選課表中的記錄
-        stmt = enrollment.select().where(
-            enrollment.c.student_id == student.id,
-            enrollment.c.course_id == course_id
-        )
-        enrollment_record = db.execute(stmt).first()
-        
-        enrollments.append({
-            "student_id": student.id,
-            "course_id": course_id,
-            "enrollment_date": enrollment_record.enrollment_date,
-            "is_active": enrollment_record.is_active
-        })
-    
-    return enrollments
+    def produce() -> bytes:
+        if db.scalar(select(Course.id).where(Course.id == course_id)) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="找不到該課程"
+            )
+        # 查詢的列與響應模式一致，直接序列化，不逐行校驗
+        return fast_read.dump_rows(EnrollmentSchema, _enrollment_rows(
+            db, enrollment.c.course_id == course_id, enrollment.c.student_id, skip, limit, is_active
+        ))
+
+    body = read_coalescer.do(("roster", course_id, skip, limit, is_active), produce)
+    return Response(content=body, media_type="application/json")
 
 @router.delete("/", status_code=status.HTTP_200_OK)
+@retry_on_busy
 def delete_enrollment(
     enrollment_in: EnrollmentDelete,
-    db: Session = Depends(deps.get_db)
+    db: Session = Depends(deps.get_write_db)
 ) -> Any:
     """
     取消選課
@@ -154,21 +184,159 @@ def delete_enrollment(
             detail="找不到該課程"
         )
     
-    # 檢查是否已選課
-    is_enrolled = False
-    for enrolled_course in student.courses:
-        if enrolled_course.id == enrollment_in.course_id:
-            is_enrolled = True
-            break
-    
-    if not is_enrolled:
+    # 刪除選課記錄並釋放名額
+    deleted = db.execute(
+        enrollment.delete().where(
+            enrollment.c.student_id == student.id,
+            enrollment.c.course_id == course.id
+        )
+    ).rowcount
+    if not deleted:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="學生未選修該課程"
         )
-    
-    # 刪除選課記錄
-    student.courses.remove(course)
+    release_seats(db, [course.id])
+    adjust_credit_load(db, [(student.id, course.id)], sign=-1)
     db.commit()
+    read_coalescer.forget("roster")
+    promotion_signal.notify()
     
-    return {"status": "success", "message": "已取消選課"} 
\ No newline at end of file
+    return {"status": "success", "message": "已取消選課"}
+
+def _existing_pairs(db: Session, pairs: List[tuple]) -> set:
+    """
+    批量查詢已存在的選課記錄
+    """
+    existing = set()
+    for chunk in chunked(pairs):
+        stmt = select(enrollment.c.student_id, enrollment.c.course_id).where(
+            tuple_(enrollment.c.student_id, enrollment.c.course_id).in_(chunk)
+        )
+        existing.update(tuple(row) for row in db.execute(stmt))
+    return existing
+
+# 批量選課與並發寫入衝突時的最多嘗試次數
+BATCH_CONFLICT_ATTEMPTS = 3
+
+def _enroll_batch(db: Session, pairs: List[tuple]) -> List[str]:
+    """
+    校驗、佔用名額並寫入批量選課記錄（不提交），按請求順序返回每一筆的狀態
+    """
+    student_ids = {student_id for student_id, _ in pairs}
+    course_ids = {course_id for _, course_id in pairs}
+
+    # 一次性查詢有效的學生與課程
+    active_students = set()
+    for chunk in chunked(student_ids):
+        active_students.update(db.scalars(
+            select(Student.id).where(Student.id.in_(chunk), Student.is_active == True)
+        ))
+
+    active_courses = set()
+    for chunk in chunked(course_ids):
+        active_courses.update(db.scalars(
+            select(Course.id).where(Course.id.in_(chunk), Course.is_active == True)
+        ))
+
+    taken = _existing_pairs(db, list(set(pairs)))
+
+    # 按請求順序判定，同一請求中的重複項也視為重複；其餘按課程分組等待佔用名額
+    statuses = []
+    candidates = {}
+    for index, (student_id, course_id) in enumerate(pairs):
+        if student_id not in active_students or course_id not in active_courses:
+            statuses.append("not_found")
+        elif (student_id, course_id) in taken:
+            statuses.append("duplicate")
+        else:
+            statuses.append(None)
+            taken.add((student_id, course_id))
+            candidates.setdefault(course_id, []).append(index)
+
+    # 每門課程一次佔用所需名額，不足時佔滿剩餘名額，按請求順序分配
+    for course_id, indexes in candidates.items():
+        granted = reserve_seats(db, course_id, len(indexes))
+        for position, index in enumerate(indexes):
+            statuses[index] = "accepted" if position < granted else "full"
+
+    now = datetime.now()
+    rows_to_insert = [
+        {"student_id": student_id, "course_id": course_id, "enrollment_date": now, "is_active": True}
+        for (student_id, course_id), item_status in zip(pairs, statuses)
+        if item_status == "accepted"
+    ]
+    if rows_to_insert:
+        db.execute(enrollment.insert(), rows_to_insert)
+        adjust_credit_load(db, [(row["student_id"], row["course_id"]) for row in rows_to_insert])
+    return statuses
+
+@router.post("/batch", response_model=EnrollmentBatchResult)
+@retry_on_busy
+def create_enrollments_batch(
+    batch_in: EnrollmentBatchCreate,
+    db: Session = Depends(deps.get_write_db)
+) -> Any:
+    """
+    批量選課（單一事務）
+    """
+    pairs = [(item.student_id, item.course_id) for item in batch_in.items]
+    for attempt in range(BATCH_CONFLICT_ATTEMPTS):
+        try:
+            statuses = _enroll_batch(db, pairs)
+            db.commit()
+            break
+        except IntegrityError:
+            # 並發請求在檢查之後搶先寫入了同一選課記錄：回滾（同時撤銷名額佔用）後重新檢查，
+            # 這些記錄再次檢查時判定為 duplicate
+            db.rollback()
+            if attempt == BATCH_CONFLICT_ATTEMPTS - 1:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="選課記錄與並發請求衝突，請重試"
+                )
+    read_coalescer.forget("roster")
+
+    results = [
+        {"student_id": student_id, "course_id": course_id, "status": item_status}
+        for (student_id, course_id), item_status in zip(pairs, statuses)
+    ]
+    return {"processed": len(results), "succeeded": statuses.count("accepted"), "results": results}
+
+@router.delete("/batch", response_model=EnrollmentBatchResult)
+@retry_on_busy
+def delete_enrollments_batch(
+    batch_in: EnrollmentBatchDelete,
+    db: Session = Depends(deps.get_write_db)
+) -> Any:
+    """
+    批量取消選課（單一事務）
+    """
+    pairs = [(item.student_id, item.course_id) for item in batch_in.items]
+    enrolled = _existing_pairs(db, list(set(pairs)))
+
+    removed = set()
+    results = []
+    for pair in pairs:
+        if pair in enrolled and pair not in removed:
+            item_status = "cancelled"
+            removed.add(pair)
+        else:
+            item_status = "not_enrolled"
+        results.append({"student_id": pair[0], "course_id": pair[1], "status": item_status})
+
+    if removed:
+        for chunk in chunked(removed):
+            db.execute(
+                enrollment.delete().where(
+                    tuple_(enrollment.c.student_id, enrollment.c.course_id).in_(chunk)
+                )
+            )
+        release_seats(db, [course_id for _, course_id in removed])
+        adjust_credit_load(db, removed, sign=-1)
+        db.commit()
+        read_coalescer.forget("roster")
+        promotion_signal.notify()
+
+    return {"processed": len(results), "succeeded": len(removed), "results": results}
@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from enum import Enum
+from typing import Any, Iterator
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.core.config import EXPORT_CHUNK_SIZE
+from app.models.models import Course, Student, enrollment
+
+router = APIRouter()
+
+class ExportEntity(str, Enum):
+    students = "students"
+    courses = "courses"
+    enrollments = "enrollments"
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+EXPORT_TABLES = {
+    ExportEntity.students: Student.__table__,
+    ExportEntity.courses: Course.__table__,
+    ExportEntity.enrollments: enrollment,
+}
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"無法序列化 {type(value).__name__}")
+
+def _stream_rows(bind: Engine, stmt, chunk_size: int) -> Iterator[list]:
+    # 使用服務端游標分批讀取，內存佔用與表大小無關
+    with bind.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(stmt)
+        for partition in result.partitions():
+            yield partition
+
+def _encode_ndjson(columns: list, partitions: Iterator[list]) -> Iterator[bytes]:
+    for rows in partitions:
+        yield "".join(
+            json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=_json_default) + "\n"
+            for row in rows
+        ).encode()
+
+def _encode_csv(columns: list, partitions: Iterator[list]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in partitions:
+        writer.writerows(
+            [value.isoformat() if isinstance(value, datetime) else value for value in row]
+            for row in rows
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # 31 表示 gzip 格式
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+@router.get("/{entity}")
+def export_data(
+    entity: ExportEntity,
+    format: ExportFormat = ExportFormat.ndjson,
+    gzip: bool = False,
+    db: Session = Depends(deps.get_read_db)
+) -> Any:
+    """
+    以流式響應導出全部學生、課程或選課記錄
+    """
+    table = EXPORT_TABLES[entity]
+    columns = [column.name for column in table.columns]
+    stmt = select(table).order_by(*table.primary_key.columns)
+
+    partitions = _stream_rows(db.get_bind(), stmt, EXPORT_CHUNK_SIZE)
+    encode = _encode_ndjson if format is ExportFormat.ndjson else _encode_csv
+    body = encode(columns, partitions)
+
+    headers = {"Content-Disposition": f'attachment; filename="{entity.value}.{format.value}"'}
+    if gzip:
+        body = _gzip(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=MEDIA_TYPES[format], headers=headers)
@@ -0,0 +1,42 @@
+import codecs
+from enum import Enum
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, File, UploadFile
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.core.cache import invalidate_course
+from app.core.config import IMPORT_BATCH_SIZE
+from app.db.importer import ImportFormat, ImportMode, import_records, read_records
+from app.schemas.imports import ImportReport
+
+router = APIRouter()
+
+class ImportEntity(str, Enum):
+    students = "students"
+    courses = "courses"
+
+@router.post("/{entity}", response_model=ImportReport)
+def import_data(
+    entity: ImportEntity,
+    file: UploadFile = File(...),
+    format: Optional[ImportFormat] = None,
+    mode: ImportMode = ImportMode.skip,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    db: Session = Depends(deps.get_write_db)
+) -> Any:
+    """
+    從上傳的 CSV/NDJSON 文件批量導入學生或課程
+
+    未指定 format 時按文件擴展名判斷；mode=atomic 時任一行出錯則全部不導入，
+    mode=skip 時跳過錯誤行並按批提交
+    """
+    if format is None:
+        format = ImportFormat.csv if (file.filename or "").endswith(".csv") else ImportFormat.ndjson
+    # SpooledTemporaryFile 在 Python 3.9 上不支持 TextIOWrapper 所需的 readable()，改用增量解碼器
+    stream = codecs.getreader("utf-8-sig")(file.file)
+    report = import_records(db, entity.value, read_records(stream, format), mode, max(batch_size, 1))
+    if entity is ImportEntity.courses and report["inserted"]:
+        invalidate_course()
+    return report
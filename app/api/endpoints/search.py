@@ -0,0 +1,110 @@
+from enum import Enum
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func, or_, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.db.search import MIN_FTS_QUERY_LENGTH, SEARCH_TABLES
+from app.db.utils import prefix_range
+from app.models.models import Course, Student
+from app.schemas.search import SearchResult
+
+router = APIRouter()
+
+class SearchType(str, Enum):
+    all = "all"
+    students = "students"
+    courses = "courses"
+
+# 前綴匹配使用的已索引欄位
+PREFIX_COLUMNS = {
+    "students_fts": (Student, [Student.name, Student.student_id, Student.email]),
+    "courses_fts": (Course, [Course.course_code, Course.title]),
+}
+
+# 短查詢做子串匹配的欄位（姓名、名稱與代碼）
+SUBSTRING_COLUMNS = {
+    "students_fts": [Student.name, Student.student_id],
+    "courses_fts": [Course.title, Course.course_code],
+}
+
+def _is_active(model):
+    # 包在表達式中，避免規劃器改用選擇性很低的 is_active 索引後再排序全部有效記錄
+    return func.coalesce(model.is_active, False) == True
+
+def _fts_search(db: Session, fts: str, q: str, limit: int, include_inactive: bool) -> List[Any]:
+    source, _, weights = SEARCH_TABLES[fts]
+    model, _ = PREFIX_COLUMNS[fts]
+    active = "" if include_inactive else f"AND {source}.is_active = 1 "
+    stmt = text(
+        f"SELECT {source}.* FROM {fts} JOIN {source} ON {source}.id = {fts}.rowid "
+        f"WHERE {fts} MATCH :q {active}"
+        f"ORDER BY bm25({fts}, {', '.join(str(w) for w in weights)}) LIMIT :limit"
+    )
+    # 作為短語查詢，避免用戶輸入被解析為 FTS5 語法
+    phrase = '"' + q.replace('"', '""') + '"'
+    return db.scalars(select(model).from_statement(stmt), {"q": phrase, "limit": limit}).all()
+
+def _prefix_search(db: Session, fts: str, q: str, limit: int, include_inactive: bool) -> List[Any]:
+    model, columns = PREFIX_COLUMNS[fts]
+    stmt = select(model).where(or_(*(prefix_range(column, q) for column in columns)))
+    if not include_inactive:
+        stmt = stmt.where(_is_active(model))
+    return db.scalars(stmt.order_by(model.id).limit(limit)).all()
+
+def _substring_search(
+    db: Session, fts: str, q: str, limit: int, include_inactive: bool, exclude: List[int]
+) -> List[Any]:
+    # 按主鍵順序掃描，找到 limit 條即停止
+    model, _ = PREFIX_COLUMNS[fts]
+    stmt = select(model).where(or_(*(func.instr(column, q) > 0 for column in SUBSTRING_COLUMNS[fts])))
+    if exclude:
+        stmt = stmt.where(model.id.notin_(exclude))
+    if not include_inactive:
+        stmt = stmt.where(_is_active(model))
+    return db.scalars(stmt.order_by(model.id).limit(limit)).all()
+
+def _search(db: Session, fts: str, q: str, limit: int, include_inactive: bool) -> List[Any]:
+    if len(q) >= MIN_FTS_QUERY_LENGTH:
+        try:
+            return _fts_search(db, fts, q, limit, include_inactive)
+        except OperationalError:
+            # 檢索表不可用（如 SQLite 不支持 FTS5）時退回前綴與子串匹配
+            db.rollback()
+    # 中文姓名與詞語多為一到兩個字，trigram 無法匹配：前綴匹配的結果排在前面，不足時以子串匹配補足
+    results = _prefix_search(db, fts, q, limit, include_inactive)
+    if len(results) < limit:
+        results += _substring_search(
+            db, fts, q, limit - len(results), include_inactive, [item.id for item in results]
+        )
+    return results
+
+@router.get("", response_model=SearchResult)
+def search(
+    q: str,
+    type: SearchType = SearchType.all,
+    limit: int = 20,
+    include_inactive: bool = False,
+    db: Session = Depends(deps.get_read_db)
+) -> Any:
+    """
+    全文搜索學生（姓名、學號、郵箱）與課程（代碼、名稱、描述）
+
+    三個字元及以上的查詢按子串匹配並以相關度排序；更短的查詢先按前綴匹配，不足 limit 條時以姓名、名稱、代碼的子串匹配補足
+    """
+    q = q.strip()
+    if not q:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="搜索關鍵字不能為空"
+        )
+    
+    result = {}
+    if type in (SearchType.all, SearchType.students):
+        result["students"] = _search(db, "students_fts", q, limit, include_inactive)
+    if type in (SearchType.all, SearchType.courses):
+        result["courses"] = _search(db, "courses_fts", q, limit, include_inactive)
+    return result
@@ -0,0 +1,119 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from typing import Any, List, Optional
+
+from app.api import deps
+from app.models.models import Course, Student
+from app.schemas.stats import CourseStats, StudentStats, StatsSummary
+
+router = APIRouter()
+
+# 統計數據均來自選課、退課、停用時增量維護的 enrolled_count 與 credit_load，不掃描選課表
+
+def _fill_rate(enrolled: int, capacity: Optional[int]) -> Optional[float]:
+    return round(enrolled / capacity, 4) if capacity else None
+
+_course_columns = (
+    Course.id.label("course_id"),
+    Course.course_code,
+    Course.title,
+    Course.enrolled_count.label("enrolled"),
+    func.coalesce(Course.max_students, 0).label("capacity"),
+    Course.is_active,
+)
+
+def _course_stats(row) -> dict:
+    data = row._asdict()
+    data["fill_rate"] = _fill_rate(data["enrolled"], data["capacity"])
+    return data
+
+@router.get("/summary", response_model=StatsSummary)
+def read_summary(db: Session = Depends(deps.get_read_db)) -> Any:
+    """
+    獲取全局統計
+    """
+    courses = db.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(Course.enrolled_count), 0),
+            func.coalesce(func.sum(Course.max_students), 0),
+        ).where(Course.is_active == True)
+    ).one()
+    students = db.execute(
+        select(func.count(), func.avg(Student.credit_load)).where(Student.is_active == True)
+    ).one()
+    return {
+        "active_students": students[0],
+        "active_courses": courses[0],
+        "enrollments": courses[1],
+        "capacity": courses[2],
+        "fill_rate": _fill_rate(courses[1], courses[2]),
+        "average_credit_load": round(students[1], 2) if students[1] is not None else None,
+    }
+
+@router.get("/courses", response_model=List[CourseStats])
+def read_course_stats(
+    skip: int = 0,
+    limit: int = 100,
+    is_active: Optional[bool] = None,
+    db: Session = Depends(deps.get_read_db)
+) -> Any:
+    """
+    獲取各課程的選課人數、容量與滿座率
+    """
+    stmt = select(*_course_columns)
+    if is_active is not None:
+        stmt = stmt.where(Course.is_active == is_active)
+    stmt = stmt.order_by(Course.id).offset(skip).limit(limit)
+    return [_course_stats(row) for row in db.execute(stmt)]
+
+@router.get("/courses/{course_id}", response_model=CourseStats)
+def read_single_course_stats(
+    course_id: int,
+    db: Session = Depends(deps.get_read_db)
+) -> Any:
+    """
+    獲取單個課程的選課統計
+    """
+    row = db.execute(select(*_course_columns).where(Course.id == course_id)).first()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="找不到該課程"
+        )
+    return _course_stats(row)
+
+_student_columns = (Student.id, Student.student_id, Student.name, Student.credit_load, Student.is_active)
+
+@router.get("/students", response_model=List[StudentStats])
+def read_student_stats(
+    skip: int = 0,
+    limit: int = 100,
+    is_active: Optional[bool] = None,
+    db: Session = Depends(deps.get_read_db)
+) -> Any:
+    """
+    獲取各學生的學分負擔
+    """
+    stmt = select(*_student_columns)
+    if is_active is not None:
+        stmt = stmt.where(Student.is_active == is_active)
+    stmt = stmt.order_by(Student.id).offset(skip).limit(limit)
+    return [row._asdict() for row in db.execute(stmt)]
+
+@router.get("/students/{student_id}", response_model=StudentStats)
+def read_single_student_stats(
+    student_id: int,
+    db: Session = Depends(deps.get_read_db)
+) -> Any:
+    """
+    獲取單個學生的學分負擔
+    """
+    row = db.execute(select(*_student_columns).where(Student.id == student_id)).first()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="找不到該學生"
+        )
+    return row._asdict()
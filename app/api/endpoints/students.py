@@ -1,17 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import Any, List
+from typing import Any, List, Optional
 
-from app.api import deps
+from app.api import deps, fast_read
+from app.api.fieldsets import FieldSet, field_set
+from app.api.filters import ListQuery, matching_ids, student_conditions, student_list_query
+from app.api.pagination import NEXT_CURSOR_HEADER, apply_cursor, order_by_columns, split_page
+from app.core.singleflight import read_coalescer
+from app.db import deactivation
+from app.db.storage import retry_on_busy
+from app.db.utils import unique_violation
+from app.db.waitlist import promotion_signal
 from app.models.models import Student
+from app.schemas.deactivation import DeactivationResult, StudentDeactivate
 from app.schemas.student import StudentCreate, StudentUpdate, Student as StudentSchema
 
 router = APIRouter()
 
+students_table = Student.__table__
+
+# fields= 查詢參數，按學生響應模式校驗
+student_fields = field_set(StudentSchema)
+
+# 唯一索引衝突對應的錯誤信息
+STUDENT_UNIQUE_MESSAGES = {
+    "student_id": "該學號已被其他學生使用",
+    "email": "該郵箱已被其他學生使用",
+}
+
 @router.post("/", response_model=StudentSchema, status_code=status.HTTP_201_CREATED)
+@retry_on_busy
 def create_student(
     student_in: StudentCreate,
-    db: Session = Depends(deps.get_db)
+    db: Session = Depends(deps.get_write_db)
 ) -> Any:
     """
     創建新學生
@@ -47,103 +70,162 @@ def create_student(
 
 @router.get("/", response_model=List[StudentSchema])
 def read_students(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(deps.get_db)
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1),
+    cursor: Optional[str] = None,
+    query: ListQuery = Depends(student_list_query),
+    fieldset: Optional[FieldSet] = Depends(student_fields),
+    db: Session = Depends(deps.get_read_db)
 ) -> Any:
     """
     獲取所有學生
+
+    可按啟用狀態、姓名前綴、學號前綴過濾，sort 指定排序欄位（前綴 - 表示降序），fields 指定返回的欄位。
+    傳入 cursor（首頁傳空字符串）時使用游標分頁，下一頁游標通過 X-Next-Cursor 響應頭返回
     """
-    students = db.query(Student).offset(skip).limit(limit).all()
-    return students
+    if fast_read.enabled or fieldset is not None:
+        return _read_students_fast(db, skip, limit, cursor, query, fieldset)
+
+    stmt = query.apply(select(Student))
+    if cursor is not None:
+        stmt = apply_cursor(stmt, cursor, limit, query.sort_column, Student.id, query.descending)
+        students, next_cursor = split_page(db.scalars(stmt).all(), limit, query.sort_column, Student.id)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return students
+    
+    stmt = stmt.order_by(*order_by_columns(query.sort_column, Student.id, query.descending))
+    return db.scalars(stmt.offset(skip).limit(limit)).all()
+
+def _read_students_fast(
+    db: Session, skip: int, limit: int, cursor: Optional[str], query: ListQuery, fieldset: Optional[FieldSet]
+) -> Response:
+    # 只查詢響應所需的列並直接序列化，跳過 ORM 實例化與 Pydantic 校驗
+    if fieldset is None:
+        stmt = fast_read.select_schema(StudentSchema, students_table)
+        to_dicts = lambda rows: fast_read.rows_to_dicts(StudentSchema, rows)
+    else:
+        stmt = fieldset.select(students_table, Student.id, query.sort_column)
+        to_dicts = fieldset.to_dicts
+    stmt = query.apply(stmt)
+    headers = {}
+    if cursor is not None:
+        rows, next_cursor = split_page(
+            db.execute(apply_cursor(stmt, cursor, limit, query.sort_column, Student.id, query.descending)).all(),
+            limit, query.sort_column, Student.id
+        )
+        if next_cursor:
+            headers[NEXT_CURSOR_HEADER] = next_cursor
+    else:
+        stmt = stmt.order_by(*order_by_columns(query.sort_column, Student.id, query.descending))
+        rows = db.execute(stmt.offset(skip).limit(limit)).all()
+    return fast_read.FastJSONResponse(to_dicts(rows), headers=headers)
+
+@router.post("/deactivate", response_model=DeactivationResult)
+@retry_on_busy
+def deactivate_students(
+    body: StudentDeactivate,
+    db: Session = Depends(deps.get_write_db)
+) -> Any:
+    """
+    批量停用學生（按ID列表或姓名、學號前綴選取）
+
+    清空選課與候補記錄並釋放名額，每批ID執行固定數量的集合操作，全部在同一事務中提交
+    """
+    ids = matching_ids(db, Student.id, body.ids, student_conditions(body.name, body.student_id))
+    result = deactivation.deactivate_students(db, ids)
+    db.commit()
+    if result["enrollments_removed"]:
+        read_coalescer.forget("roster")
+        promotion_signal.notify()
+    return {"matched": len(ids), **result}
 
 @router.get("/{student_id}", response_model=StudentSchema)
 def read_student(
     student_id: int,
-    db: Session = Depends(deps.get_db)
+    fieldset: Optional[FieldSet] = Depends(student_fields),
+    db: Session = Depends(deps.get_read_db)
 ) -> Any:
     """
-    根據ID獲取學生
+    根據ID獲取學生，fields 指定返回的欄位
     """
-    student = db.query(Student).filter(Student.id == student_id).first()
+    if fieldset is None:
+        student = db.query(Student).filter(Student.id == student_id).first()
+    else:
+        student = db.execute(fieldset.select(students_table).where(students_table.c.id == student_id)).first()
     if not student:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="找不到該學生"
         )
+    if fieldset is not None:
+        return fast_read.FastJSONResponse(fieldset.to_dicts([student])[0])
     return student
 
 @router.put("/{student_id}", response_model=StudentSchema)
+@retry_on_busy
 def update_student(
     student_id: int,
     student_in: StudentUpdate,
-    db: Session = Depends(deps.get_db)
+    db: Session = Depends(deps.get_write_db)
 ) -> Any:
     """
-    更新學生信息
+    更新學生信息（單條 UPDATE ... RETURNING，學號、郵箱衝突由唯一索引檢查）
     """
-    student = db.query(Student).filter(Student.id == student_id).first()
-    if not student:
+    # 獲取更新數據 (只包含有變更的字段)
+    update_data = student_in.dict(exclude_unset=True)
+    if not update_data:
+        student = db.execute(select(students_table).where(students_table.c.id == student_id)).first()
+    else:
+        try:
+            student = db.execute(
+                update(students_table)
+                .where(students_table.c.id == student_id)
+                .values(**update_data)
+                .returning(*students_table.c)
+            ).first()
+            db.commit()
+        except IntegrityError as exc:
+            db.rollback()
+            detail = unique_violation(exc, STUDENT_UNIQUE_MESSAGES)
+            if detail is None:
+                raise
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+    if student is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="找不到該學生"
         )
-    
-    # 獲取更新數據 (只包含有變更的字段)
-    update_data = student_in.dict(exclude_unset=True)
-    
-    # 檢查學號唯一性 (如果要更新學號)
-    if "student_id" in update_data and update_data["student_id"] != student.student_id:
-        exists = db.query(Student).filter(
-            Student.student_id == update_data["student_id"],
-            Student.id != student_id
-        ).first()
-        if exists:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="該學號已被其他學生使用"
-            )
-    
-    # 檢查郵箱唯一性 (如果要更新郵箱)
-    if "email" in update_data and update_data["email"] != student.email:
-        exists = db.query(Student).filter(
-            Student.email == update_data["email"],
-            Student.id != student_id
-        ).first()
-        if exists:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="該郵箱已被其他學生使用"
-            )
-    
-    # 更新字段
-    for field, value in update_data.items():
-        setattr(student, field, value)
-    
-    db.commit()
-    db.refresh(student)
-    return student
+    return student._asdict()
 
 @router.delete("/{student_id}", response_model=StudentSchema)
+@retry_on_busy
 def delete_student(
     student_id: int,
-    db: Session = Depends(deps.get_db)
+    db: Session = Depends(deps.get_write_db)
 ) -> Any:
     """
     刪除學生
     """
-    student = db.query(Student).filter(Student.id == student_id).first()
-    if not student:
+    # 執行軟刪除
+    student = db.execute(
+        update(students_table)
+        .where(students_table.c.id == student_id)
+        .values(is_active=False)
+        .returning(*students_table.c)
+    ).first()
+    if student is None:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="找不到該學生"
         )
     
-    # 清空該學生的選課關係
-    student.courses = []
-    
-    # 執行軟刪除
-    student.is_active = False
+    # 清空該學生的選課關係並釋放所佔名額
+    removed = deactivation.clear_student_enrollments(db, [student_id])
     db.commit()
-    db.refresh(student)
-    return student 
\ No newline at end of file
+    if removed["enrollments_removed"]:
+        read_coalescer.forget("roster")
+        promotion_signal.notify()
+    return student._asdict()
@@ -0,0 +1,149 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import Any, List
+from datetime import datetime
+
+from app.api import deps
+from app.db.seats import is_enrolled
+from app.db.storage import retry_on_busy
+from app.db.waitlist import promotion_signal, waitlist_position
+from app.models.models import Student, Course, waitlist
+from app.schemas.waitlist import WaitlistCreate, WaitlistDelete, WaitlistEntry, WaitlistPosition
+
+router = APIRouter()
+
+def _find_entry(db: Session, student_id: int, course_id: int):
+    return db.execute(
+        select(waitlist.c.id, waitlist.c.created_at).where(
+            waitlist.c.student_id == student_id,
+            waitlist.c.course_id == course_id
+        )
+    ).first()
+
+@router.post("/", response_model=WaitlistEntry, status_code=status.HTTP_201_CREATED)
+@retry_on_busy
+def join_waitlist(
+    waitlist_in: WaitlistCreate,
+    db: Session = Depends(deps.get_write_db)
+) -> Any:
+    """
+    加入課程候補名單
+    """
+    student = db.query(Student).filter(Student.id == waitlist_in.student_id).first()
+    if not student or not student.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="找不到該學生或學生已停用"
+        )
+    
+    course = db.query(Course).filter(Course.id == waitlist_in.course_id).first()
+    if not course or not course.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="找不到該課程或課程已停用"
+        )
+    
+    if is_enrolled(db, student.id, course.id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="學生已選修該課程"
+        )
+    
+    created_at = datetime.now()
+    try:
+        entry_id = db.execute(waitlist.insert().values(
+            student_id=student.id,
+            course_id=course.id,
+            created_at=created_at
+        )).inserted_primary_key[0]
+        position = waitlist_position(db, entry_id, course.id)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="學生已在候補名單中"
+        )
+    
+    # 課程仍有空位時由遞補任務立即處理
+    promotion_signal.notify()
+    return {"student_id": student.id, "course_id": course.id, "position": position, "created_at": created_at}
+
+@router.delete("/", status_code=status.HTTP_200_OK)
+@retry_on_busy
+def leave_waitlist(
+    waitlist_in: WaitlistDelete,
+    db: Session = Depends(deps.get_write_db)
+) -> Any:
+    """
+    退出課程候補名單
+    """
+    deleted = db.execute(
+        waitlist.delete().where(
+            waitlist.c.student_id == waitlist_in.student_id,
+            waitlist.c.course_id == waitlist_in.course_id
+        )
+    ).rowcount
+    if not deleted:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="學生不在候補名單中"
+        )
+    db.commit()
+    
+    return {"status": "success", "message": "已退出候補名單"}
+
+@router.get("/students/{student_id}/courses/{course_id}", response_model=WaitlistPosition)
+def read_waitlist_position(
+    student_id: int,
+    course_id: int,
+    db: Session = Depends(deps.get_read_db)
+) -> Any:
+    """
+    查詢候補位置，遞補成功後返回已選課狀態
+    """
+    entry = _find_entry(db, student_id, course_id)
+    if entry is not None:
+        return {
+            "student_id": student_id,
+            "course_id": course_id,
+            "status": "waiting",
+            "position": waitlist_position(db, entry.id, course_id),
+        }
+    if is_enrolled(db, student_id, course_id):
+        return {"student_id": student_id, "course_id": course_id, "status": "enrolled"}
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="學生不在候補名單中"
+    )
+
+@router.get("/courses/{course_id}", response_model=List[WaitlistEntry])
+def read_course_waitlist(
+    course_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(deps.get_read_db)
+) -> Any:
+    """
+    按先後順序獲取課程候補名單
+    """
+    if db.scalar(select(Course.id).where(Course.id == course_id)) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="找不到該課程"
+        )
+    
+    rows = db.execute(
+        select(waitlist.c.student_id, waitlist.c.created_at)
+        .where(waitlist.c.course_id == course_id)
+        .order_by(waitlist.c.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    return [
+        {"student_id": row.student_id, "course_id": course_id, "position": skip + index + 1, "created_at": row.created_at}
+        for index, row in enumerate(rows)
+    ]
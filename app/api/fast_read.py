@@ -0,0 +1,33 @@
+from typing import Any, List, Sequence, Type
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy import Table, select
+
+from app.core.config import FAST_READ_PATH
+
+# 是否使用快速讀取路徑；關閉時列表端點回到 ORM + Pydantic 的常規路徑，可在運行時切換以便對比
+enabled = FAST_READ_PATH
+
+class FastJSONResponse(Response):
+    """
+    以 orjson 序列化的 JSON 響應，日期時間等格式與 Pydantic 的 JSON 輸出一致
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+def select_schema(schema: Type[BaseModel], table: Table):
+    """
+    按響應模式的欄位及順序只查詢需要的列，不構建 ORM 對象
+    """
+    return select(*(table.c[name] for name in schema.model_fields))
+
+def rows_to_dicts(schema: Type[BaseModel], rows: Sequence[Any]) -> List[dict]:
+    names = list(schema.model_fields)
+    return [dict(zip(names, row)) for row in rows]
+
+def dump_rows(schema: Type[BaseModel], rows: Sequence[Any]) -> bytes:
+    return orjson.dumps(rows_to_dicts(schema, rows))
@@ -0,0 +1,58 @@
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Type
+
+import orjson
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+from sqlalchemy import Table, select
+
+class FieldSet:
+    """
+    請求中 fields= 指定的欄位子集（按響應模式中的順序）
+
+    查詢只選取這些列，響應也只包含這些欄位
+    """
+
+    def __init__(self, names: Tuple[str, ...]):
+        self.names = names
+        self.key = ",".join(names)
+
+    def select(self, table: Table, *required):
+        """
+        查詢所需的列；分頁等需要但未請求的列（如 id、排序鍵）附加在後，序列化時不輸出
+        """
+        extra = {column.key: column for column in required if column.key not in self.names}
+        return select(*(table.c[name] for name in self.names), *extra.values())
+
+    def to_dicts(self, rows: Sequence[Any]) -> List[dict]:
+        # 請求的欄位位於每行的開頭，zip 在此截斷
+        return [dict(zip(self.names, row)) for row in rows]
+
+    def dump(self, rows: Sequence[Any]) -> bytes:
+        return orjson.dumps(self.to_dicts(rows))
+
+def field_set(schema: Type[BaseModel]) -> Callable[..., Optional[FieldSet]]:
+    """
+    生成解析 fields= 查詢參數的依賴，欄位名按響應模式校驗
+    """
+    available = list(schema.model_fields)
+
+    def dependency(
+        fields: Optional[str] = Query(None, description=f"以逗號分隔的欄位列表，可選：{', '.join(available)}"),
+    ) -> Optional[FieldSet]:
+        if fields is None:
+            return None
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        if not requested:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="fields 至少需要指定一個欄位"
+            )
+        unknown = sorted(requested.difference(available))
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"不支持的欄位：{', '.join(unknown)}，可選：{', '.join(available)}"
+            )
+        return FieldSet(tuple(name for name in available if name in requested))
+
+    return dependency
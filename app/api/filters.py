@@ -0,0 +1,119 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.utils import chunked, prefix_range
+from app.models.models import Course, Student
+
+# 允許排序的欄位，均有對應的索引；前綴 "-" 表示降序
+STUDENT_SORT_COLUMNS = {
+    "id": Student.id,
+    "student_id": Student.student_id,
+    "name": Student.name,
+    "email": Student.email,
+    "created_at": Student.created_at,
+}
+COURSE_SORT_COLUMNS = {
+    "id": Course.id,
+    "course_code": Course.course_code,
+    "title": Course.title,
+    "credits": Course.credits,
+    "created_at": Course.created_at,
+}
+
+class ListQuery:
+    """
+    列表端點的過濾條件與排序方式
+
+    key 由請求參數組成，用作快取與合併讀取的鍵
+    """
+
+    def __init__(self, conditions: List[Any], sort_column, descending: bool, key: Tuple[Any, ...]):
+        self.conditions = conditions
+        self.sort_column = sort_column
+        self.descending = descending
+        self.key = key
+
+    def apply(self, stmt):
+        return stmt.where(*self.conditions)
+
+def _sort(sort: str, columns: Dict[str, Any]):
+    name = sort[1:] if sort.startswith("-") else sort
+    if name not in columns:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"不支持的排序欄位：{name}，可選：{', '.join(columns)}"
+        )
+    return columns[name], sort.startswith("-")
+
+def _prefix(column, prefix: Optional[str]) -> List[Any]:
+    # 前綴匹配轉換為索引範圍查找，不使用 LIKE
+    return [prefix_range(column, prefix)] if prefix else []
+
+def student_conditions(name: Optional[str] = None, student_id: Optional[str] = None) -> List[Any]:
+    return _prefix(Student.name, name) + _prefix(Student.student_id, student_id)
+
+def course_conditions(
+    course_code: Optional[str] = None,
+    title: Optional[str] = None,
+    credits_min: Optional[int] = None,
+    credits_max: Optional[int] = None,
+) -> List[Any]:
+    conditions = _prefix(Course.course_code, course_code) + _prefix(Course.title, title)
+    if credits_min is not None:
+        conditions.append(Course.credits >= credits_min)
+    if credits_max is not None:
+        conditions.append(Course.credits <= credits_max)
+    return conditions
+
+def matching_ids(db: Session, id_column, ids: Optional[List[int]], conditions: List[Any]) -> List[int]:
+    """
+    解析批量操作的目標ID：只有ID列表時原樣返回，帶過濾條件時查詢符合條件的ID（與ID列表取交集）
+    """
+    if ids is None and not conditions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="請提供ID列表或至少一個過濾條件"
+        )
+    if not conditions:
+        return list(dict.fromkeys(ids))
+    stmt = select(id_column).where(*conditions)
+    if ids is None:
+        return db.scalars(stmt).all()
+    return [
+        matched
+        for chunk in chunked(dict.fromkeys(ids))
+        for matched in db.scalars(stmt.where(id_column.in_(chunk))).all()
+    ]
+
+_SORT_DESCRIPTION = "排序欄位，前綴 - 表示降序"
+
+def student_list_query(
+    is_active: Optional[bool] = None,
+    name: Optional[str] = Query(None, description="姓名前綴"),
+    student_id: Optional[str] = Query(None, description="學號前綴"),
+    sort: str = Query("id", description=_SORT_DESCRIPTION),
+) -> ListQuery:
+    conditions = student_conditions(name, student_id)
+    if is_active is not None:
+        conditions.append(Student.is_active == is_active)
+    sort_column, descending = _sort(sort, STUDENT_SORT_COLUMNS)
+    return ListQuery(conditions, sort_column, descending, (is_active, name, student_id, sort))
+
+def course_list_query(
+    is_active: Optional[bool] = None,
+    credits_min: Optional[int] = None,
+    credits_max: Optional[int] = None,
+    course_code: Optional[str] = Query(None, description="課程代碼前綴"),
+    title: Optional[str] = Query(None, description="課程名稱前綴"),
+    sort: str = Query("id", description=_SORT_DESCRIPTION),
+) -> ListQuery:
+    conditions = course_conditions(course_code, title, credits_min, credits_max)
+    if is_active is not None:
+        conditions.append(Course.is_active == is_active)
+    sort_column, descending = _sort(sort, COURSE_SORT_COLUMNS)
+    return ListQuery(
+        conditions, sort_column, descending, (is_active, credits_min, credits_max, course_code, title, sort)
+    )
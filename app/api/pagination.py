@@ -0,0 +1,84 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+# 游標分頁時返回下一頁游標的響應頭
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def _to_json(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    將最後一條記錄的 (排序鍵, id) 編碼為不透明游標
+    """
+    raw = json.dumps([_to_json(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _cursor_value(value: Any, column) -> Any:
+    # 游標由客戶端傳回，每個值都需符合對應列的類型，否則任意 JSON 值會被當作綁定參數傳給驅動
+    python_type = column.type.python_type
+    if value is None and column.nullable:
+        return None
+    if python_type is datetime and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if python_type is not datetime and type(value) is python_type:
+        return value
+    raise ValueError(value)
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> Optional[Tuple[Any, ...]]:
+    """
+    解碼游標，空字符串表示從第一頁開始
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError(cursor)
+        return tuple(_cursor_value(value, column) for value, column in zip(values, columns))
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="無效的分頁游標"
+        )
+
+def keyset_columns(sort_column, id_column) -> List[Any]:
+    # 按 id 排序時游標只需要 id 本身
+    if sort_column is None or sort_column is id_column:
+        return [id_column]
+    return [sort_column, id_column]
+
+def order_by_columns(sort_column, id_column, descending: bool = False) -> List[Any]:
+    # 以 id 作為次要排序鍵保證順序穩定
+    columns = keyset_columns(sort_column, id_column)
+    return [column.desc() for column in columns] if descending else columns
+
+def apply_cursor(stmt, cursor: str, limit: int, sort_column, id_column, descending: bool = False):
+    """
+    以 (排序鍵, id) 的範圍條件代替 OFFSET，並多取一條用於判斷是否還有下一頁
+    """
+    columns = keyset_columns(sort_column, id_column)
+    values = decode_cursor(cursor, columns)
+    if values is not None:
+        left = columns[0] if len(columns) == 1 else tuple_(*columns)
+        right = values[0] if len(columns) == 1 else tuple_(*values)
+        stmt = stmt.where(left < right if descending else left > right)
+    return stmt.order_by(*order_by_columns(sort_column, id_column, descending)).limit(limit + 1)
+
+def split_page(rows: List[Any], limit: int, sort_column, id_column) -> Tuple[List[Any], Optional[str]]:
+    """
+    截取本頁記錄並生成下一頁游標（沒有下一頁時為 None）
+    """
+    if limit <= 0:
+        return [], None
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, column.key) for column in keyset_columns(sort_column, id_column)])
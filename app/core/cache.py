@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from app.core.config import COURSE_CACHE_ENABLED, COURSE_CACHE_SIZE, COURSE_CACHE_TTL
+from app.core.metrics import registry, sample_lines
+from app.core.singleflight import read_coalescer
+
+class LRUCache:
+    """
+    有容量上限和過期時間的線程安全 LRU 快取
+    """
+
+    def __init__(self, maxsize: int, ttl: float, enabled: bool = True):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = enabled and maxsize > 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # 每次失效時遞增；生成響應期間發生過失效時，生成結果可能已過期，不寫入快取
+        self.generation = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """
+        寫入快取；傳入生成前讀取的 generation 時，若期間發生過失效則放棄寫入
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self.generation += 1
+            self._data.pop(key, None)
+
+    def invalidate_prefix(self, prefix: Hashable) -> None:
+        # 鍵為元組時按第一個元素批量失效
+        with self._lock:
+            self.generation += 1
+            for key in [key for key in self._data if isinstance(key, tuple) and key[0] == prefix]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+# 課程目錄快取，保存已序列化的課程響應
+course_cache = LRUCache(COURSE_CACHE_SIZE, COURSE_CACHE_TTL, enabled=COURSE_CACHE_ENABLED)
+
+def _collect_course_cache() -> list:
+    stats = course_cache.stats()
+    return (
+        sample_lines("course_cache_entries", "課程快取中的響應數", "gauge", stats["size"])
+        + sample_lines("course_cache_hits_total", "課程快取命中次數", "counter", stats["hits"])
+        + sample_lines("course_cache_misses_total", "課程快取未命中次數", "counter", stats["misses"])
+        + sample_lines("course_cache_evictions_total", "課程快取淘汰次數", "counter", stats["evictions"])
+    )
+
+registry.add_collector(_collect_course_cache)
+
+def invalidate_course(course_id: Optional[int] = None) -> None:
+    """
+    課程寫入後調用：失效對應課程的快取及所有課程列表頁，並停止共享進行中的課程查詢
+    """
+    if course_id is not None:
+        course_cache.invalidate(("course", course_id))
+    course_cache.invalidate_prefix("courses")
+    # 寫入前已開始的查詢不再被之後的請求共享
+    read_coalescer.forget("course")
+    read_coalescer.forget("courses")
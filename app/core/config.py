@@ -8,6 +8,94 @@ BASE_DIR = Path(__file__).resolve().parent.parent.parent
 SQLITE_DB_URL = f"sqlite:///{BASE_DIR}/sql_app.db"
 DATABASE_URL = os.getenv("DATABASE_URL", SQLITE_DB_URL)
 
+# 讀請求使用的數據庫：默認與 DATABASE_URL 相同（SQLite 時使用只讀連接），其他數據庫可指向只讀副本
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL", DATABASE_URL)
+
+# 讀寫連接池大小：寫連接池保持較小以串行化寫入，讀連接池可按並發讀取數放大
+DB_WRITE_POOL_SIZE = int(os.getenv("DB_WRITE_POOL_SIZE", "2"))
+DB_WRITE_MAX_OVERFLOW = int(os.getenv("DB_WRITE_MAX_OVERFLOW", "0"))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "8"))
+DB_READ_MAX_OVERFLOW = int(os.getenv("DB_READ_MAX_OVERFLOW", "8"))
+
+# 讀寫分離到副本時，客戶端寫入後的這段時間（秒）內其讀請求仍走主庫，保證讀到自己的寫入
+READ_YOUR_WRITES_WINDOW = float(os.getenv("READ_YOUR_WRITES_WINDOW", "5"))
+
+# SQLite 寫入遇到 SQLITE_BUSY（database is locked）時的重試次數與初始退避時間（秒），退避逐次翻倍
+SQLITE_BUSY_RETRIES = int(os.getenv("SQLITE_BUSY_RETRIES", "5"))
+SQLITE_BUSY_BACKOFF = float(os.getenv("SQLITE_BUSY_BACKOFF", "0.02"))
+
+# 多工作進程部署時協調各進程的文件鎖目錄（初始化數據庫、選出執行後台任務的進程）
+LOCK_DIR = Path(os.getenv("LOCK_DIR", BASE_DIR / "data"))
+
+# 啟動時同步數據庫結構的方式：fingerprint（結構指紋一致時跳過建表）或 always（每次執行 create_all）
+SCHEMA_SYNC_MODE = os.getenv("SCHEMA_SYNC_MODE", "fingerprint")
+
+# 數據庫訪問模式：sync 使用線程池中的同步會話，async 使用異步引擎與異步端點
+DB_MODE = os.getenv("DB_MODE", "sync")
+
+# 同步驅動對應的異步驅動
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+def _async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(DATABASE_URL))
+
+# SQLite 存儲配置，每個新連接建立時執行對應的 PRAGMA
+# default 保持 SQLite 默認行為；production 啟用 WAL，寫入時不阻塞讀取
+SQLITE_STORAGE_PROFILES = {
+    "default": {},
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 268435456,  # 256MB
+        "cache_size": -65536,  # 負數表示以KB為單位，即64MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,  # 毫秒
+        "foreign_keys": "ON",
+    },
+}
+SQLITE_STORAGE_PROFILE = os.getenv("SQLITE_STORAGE_PROFILE", "default")
+
+def _parse_pragmas(value: str) -> dict:
+    # 格式：name=value,name=value
+    pairs = (item.split("=", 1) for item in value.split(",") if "=" in item)
+    return {name.strip(): setting.strip() for name, setting in pairs}
+
+SQLITE_PRAGMAS = {
+    **SQLITE_STORAGE_PROFILES[SQLITE_STORAGE_PROFILE],
+    **_parse_pragmas(os.getenv("SQLITE_PRAGMAS", "")),
+}
+
+# WAL 檢查點與 PRAGMA optimize 的執行間隔（秒），0 表示不執行
+SQLITE_MAINTENANCE_INTERVAL = int(os.getenv("SQLITE_MAINTENANCE_INTERVAL", "300"))
+
+# 課程目錄快取設置
+COURSE_CACHE_ENABLED = os.getenv("COURSE_CACHE_ENABLED", "true").lower() == "true"
+COURSE_CACHE_SIZE = int(os.getenv("COURSE_CACHE_SIZE", "1024"))
+COURSE_CACHE_TTL = float(os.getenv("COURSE_CACHE_TTL", "60"))  # 秒
+
+# 列表端點使用 Core 查詢 + orjson 直接序列化的快速讀取路徑，false 時使用 ORM + Pydantic
+FAST_READ_PATH = os.getenv("FAST_READ_PATH", "true").lower() == "true"
+
+# 相同讀取請求合併：可加入進行中查詢的最長時間（秒），0 表示不合併
+SINGLE_FLIGHT_WINDOW = float(os.getenv("SINGLE_FLIGHT_WINDOW", "1.0"))
+
+# 數據導出時每批讀取與輸出的行數
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+# 批量導入時每批校驗與插入的行數
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+
+# 候補名單自動遞補：定期掃描的間隔（秒，0 表示不啟動遞補任務）與每批遞補的人數
+WAITLIST_PROMOTION_INTERVAL = float(os.getenv("WAITLIST_PROMOTION_INTERVAL", "5"))
+WAITLIST_BATCH_SIZE = int(os.getenv("WAITLIST_BATCH_SIZE", "500"))
+
 # API設置
 API_V1_STR = "/api/v1"
 PROJECT_NAME = "學生選課管理系統"
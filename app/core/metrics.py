@@ -0,0 +1,269 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# 延遲直方圖的默認分桶（秒）
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 每個請求 SQL 語句數的分桶
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in items
+        ]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # [各分桶計數, 總和, 總數]
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, ([*counts], total, count)) for labels, (counts, total, count) in self._values.items())
+        lines = self.header()
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+def sample_lines(name: str, documentation: str, kind: str, value: float) -> List[str]:
+    """
+    生成單個無標籤指標的文本格式
+    """
+    return [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}", f"{name} {value}"]
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], List[str]]) -> None:
+        # 抓取時才計算的指標（如快取計數）
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(Counter(
+    "http_requests_total", "HTTP 請求總數", ["method", "route", "status"]))
+HTTP_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP 請求處理延遲", ["method", "route"]))
+HTTP_IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight", "正在處理的 HTTP 請求數"))
+DB_STATEMENTS = registry.register(Counter(
+    "db_statements_total", "執行的 SQL 語句總數"))
+DB_STATEMENTS_PER_REQUEST = registry.register(Histogram(
+    "db_statements_per_request", "每個請求執行的 SQL 語句數", ["method", "route"], buckets=STATEMENT_BUCKETS))
+DB_TIME_PER_REQUEST = registry.register(Histogram(
+    "db_time_per_request_seconds", "每個請求在 SQL 執行上花費的時間", ["method", "route"]))
+DB_POOL_WAIT = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "從連接池取得連接的等待時間", ["pool"]))
+DB_POOL_CHECKED_OUT = registry.register(Gauge(
+    "db_pool_checked_out", "當前被佔用的連接數", ["pool"]))
+
+STARTUP_SECONDS = registry.register(Gauge(
+    "app_startup_seconds", "冷啟動各階段耗時（導入、數據庫初始化、首個請求）", ["phase"]))
+
+class StartupReport:
+    """
+    記錄冷啟動各階段的耗時，首個請求完成後輸出完整報告
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self._awaiting_first_request = True
+        self._lock = threading.Lock()
+
+    def record(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = seconds
+        STARTUP_SECONDS.set(phase, value=round(seconds, 6))
+
+    def first_request(self, seconds: float) -> None:
+        if not self._awaiting_first_request:
+            return
+        with self._lock:
+            if not self._awaiting_first_request:
+                return
+            self._awaiting_first_request = False
+        self.record("first_request", seconds)
+        logger.info(f"啟動耗時：{self.summary()}")
+
+    def summary(self) -> str:
+        return "，".join(f"{phase} {seconds:.3f}s" for phase, seconds in self.phases.items())
+
+startup_report = StartupReport()
+
+class RequestStats:
+    __slots__ = ("statements", "db_time")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+
+# 當前請求的 SQL 統計；同步端點在線程池中執行時會複製上下文，共享同一對象
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # 開始時間記在本次執行的上下文上：執行失敗時不會觸發 after_cursor_execute，也不會殘留到之後的語句
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_metrics_start", None)
+    elapsed = time.perf_counter() - start if start is not None else 0.0
+    DB_STATEMENTS.inc()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_time += elapsed
+
+def instrument_pool(engine: Engine, name: str = "default") -> None:
+    """
+    記錄連接池的取連接等待時間與佔用數
+    """
+    pool = engine.pool
+    connect = pool.connect
+
+    # Engine 通過 pool.connect() 取得連接，在實例上包裝即可計時
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - start, name)
+
+    pool.connect = timed_connect
+    event.listen(pool, "checkout", lambda *args: DB_POOL_CHECKED_OUT.inc(name))
+    event.listen(pool, "checkin", lambda *args: DB_POOL_CHECKED_OUT.dec(name))
+
+def route_template(scope) -> str:
+    """
+    返回匹配到的路由模板，如 /api/v1/courses/5 -> /api/v1/courses/{course_id}
+    """
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    # 新版 FastAPI 保留嵌套路由，scope["route"] 只帶子路由器內的相對路徑，完整模板在生效的路由上下文中
+    effective = (scope.get("fastapi") or {}).get("effective_route_context")
+    return getattr(effective, "path", None) or getattr(route, "path", scope["path"])
+
+class MetricsMiddleware:
+    """
+    記錄每個請求的延遲、狀態碼、SQL 語句數與 SQL 時間（純 ASGI 中間件，開銷很小）
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            _request_stats.reset(token)
+            # 使用路由模板作為標籤，避免路徑參數造成標籤數量膨脹
+            route_path = route_template(scope)
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method, route_path, str(status_code))
+            HTTP_LATENCY.observe(elapsed, method, route_path)
+            DB_STATEMENTS_PER_REQUEST.observe(stats.statements, method, route_path)
+            DB_TIME_PER_REQUEST.observe(stats.db_time, method, route_path)
+            startup_report.first_request(elapsed)
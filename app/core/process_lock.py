@@ -0,0 +1,52 @@
+import hashlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows 不支持 flock，僅單進程運行
+    fcntl = None
+
+from app.core.config import DATABASE_URL, LOCK_DIR
+
+def lock_path(name: str) -> Path:
+    # 按數據庫地址區分，同一機器上指向不同數據庫的部署互不影響
+    digest = hashlib.sha1(DATABASE_URL.encode()).hexdigest()[:12]
+    return LOCK_DIR / f"coursecrud-{digest}-{name}.lock"
+
+def _open(name: str) -> IO:
+    path = lock_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return open(path, "a+")
+
+@contextmanager
+def exclusive(name: str) -> Iterator[None]:
+    """
+    跨進程互斥：同一時刻只有一個工作進程執行代碼塊，其餘進程等待
+    """
+    if fcntl is None:
+        yield
+        return
+    with _open(name) as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+def try_hold(name: str) -> Optional[IO]:
+    """
+    非阻塞地取得鎖並一直持有，成功時返回文件對象（關閉即釋放），已被其他進程持有時返回 None
+
+    進程退出時操作系統自動釋放鎖，其他進程可以接替
+    """
+    handle = _open(name)
+    if fcntl is None:
+        return handle
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
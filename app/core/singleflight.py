@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable
+
+from app.core.config import SINGLE_FLIGHT_WINDOW
+from app.core.metrics import Counter, registry
+
+SINGLE_FLIGHT_EXECUTIONS = registry.register(Counter(
+    "singleflight_executions_total", "合併讀取中實際執行的次數", ["endpoint"]))
+SINGLE_FLIGHT_COLLAPSED = registry.register(Counter(
+    "singleflight_collapsed_total", "被合併、直接共享執行結果的請求數", ["endpoint"]))
+
+class _Call:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.future: Future = Future()
+
+def _in_event_loop() -> bool:
+    # 異步模式下端點在事件循環線程中執行，阻塞等待其他請求會卡住事件循環
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+class SingleFlight:
+    """
+    合併相同的並發讀取：同一鍵同時只執行一次，期間到達的請求等待並共享結果
+
+    只有開始執行不超過 window 秒的調用可以被加入；執行完成後立即移除，之後的請求重新執行，不會讀到過時結果
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: tuple, fn: Callable[[], Any]) -> Any:
+        if self.window <= 0 or _in_event_loop():
+            return fn()
+        endpoint = str(key[0])
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None or time.monotonic() - call.started > self.window
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            SINGLE_FLIGHT_COLLAPSED.inc(endpoint)
+            return call.future.result()
+
+        SINGLE_FLIGHT_EXECUTIONS.inc(endpoint)
+        try:
+            result = fn()
+        except BaseException as exc:
+            self._finish(key, call)
+            call.future.set_exception(exc)
+            raise
+        # 先移除再發布結果，完成後到達的請求不會再加入這次執行
+        self._finish(key, call)
+        call.future.set_result(result)
+        return result
+
+    def _finish(self, key: Hashable, call: _Call) -> None:
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def forget(self, prefix: Hashable) -> None:
+        """
+        寫入後調用：之後的請求不再加入按第一個元素匹配的進行中調用
+        """
+        with self._lock:
+            for key in [key for key in self._calls if key[0] == prefix]:
+                del self._calls[key]
+
+# 讀取端點共用的請求合併器
+read_coalescer = SingleFlight(SINGLE_FLIGHT_WINDOW)
@@ -1,13 +1,71 @@
+import os
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-from app.core.config import DATABASE_URL
+from app.core.config import (
+    ASYNC_DATABASE_URL,
+    DATABASE_URL,
+    DB_MODE,
+    DB_READ_MAX_OVERFLOW,
+    DB_READ_POOL_SIZE,
+    DB_WRITE_MAX_OVERFLOW,
+    DB_WRITE_POOL_SIZE,
+    READ_DATABASE_URL,
+    SQLITE_PRAGMAS,
+)
+from app.core.metrics import instrument_pool
+from app.db.storage import configure_sqlite
+
+def _is_memory(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+def _create_engine(url: str, name: str, pool_size: int, max_overflow: int, pragmas):
+    # 內存 SQLite 使用 SQLAlchemy 默認的單連接池，不支持設置連接池大小
+    pool_args = {} if _is_memory(url) else {"pool_size": pool_size, "max_overflow": max_overflow}
+    new_engine = create_engine(url, connect_args={"check_same_thread": False}, **pool_args)
+    configure_sqlite(new_engine, pragmas)
+    instrument_pool(new_engine, name)
+    return new_engine
+
+# 創建SQLAlchemy引擎（寫入及需要讀到最新寫入的請求使用）
+engine = _create_engine(DATABASE_URL, "write", DB_WRITE_POOL_SIZE, DB_WRITE_MAX_OVERFLOW, SQLITE_PRAGMAS)
 
-# 創建SQLAlchemy引擎
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# 讀引擎：指向副本時為獨立數據庫；與寫庫相同的 SQLite 文件則使用 query_only 的只讀連接，
+# WAL 模式下讀連接不會與寫連接爭用；內存數據庫無法跨連接池共享，讀寫共用同一引擎
+read_replica = READ_DATABASE_URL != DATABASE_URL
+if read_replica or not _is_memory(DATABASE_URL):
+    read_pragmas = {name: value for name, value in SQLITE_PRAGMAS.items() if name != "journal_mode"}
+    if not read_replica:
+        read_pragmas["query_only"] = "ON"
+    read_engine = _create_engine(READ_DATABASE_URL, "read", DB_READ_POOL_SIZE, DB_READ_MAX_OVERFLOW, read_pragmas)
+else:
+    read_engine = engine
+
+def _discard_inherited_connections():
+    # 以 fork 方式創建的工作進程（如 gunicorn --preload）會繼承父進程連接池中的連接，
+    # 子進程中只丟棄而不關閉，由子進程按需建立自己的連接
+    engine.dispose(close=False)
+    read_engine.dispose(close=False)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_discard_inherited_connections)
 
 # 創建Session
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# 異步模式下的引擎與Session（需要安裝對應的異步驅動，如 aiosqlite）
+async_engine = None
+AsyncSessionLocal = None
+if DB_MODE == "async":
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(ASYNC_DATABASE_URL)
+    configure_sqlite(async_engine.sync_engine, SQLITE_PRAGMAS)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # 創建Base類
 Base = declarative_base()
@@ -18,4 +76,4 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
@@ -0,0 +1,100 @@
+from collections import Counter
+from typing import Dict, Iterable
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.db.seats import release_seats
+from app.db.utils import chunked
+from app.models.models import Course, Student, enrollment, waitlist
+
+courses_table = Course.__table__
+students_table = Student.__table__
+
+def _result() -> Dict[str, int]:
+    return {"deactivated": 0, "enrollments_removed": 0, "waitlist_removed": 0}
+
+def clear_student_enrollments(db: Session, student_ids: Iterable[int]) -> Dict[str, int]:
+    """
+    刪除學生的選課與候補記錄，釋放所佔名額並將學分負擔歸零，返回刪除的記錄數
+    """
+    result = _result()
+    for chunk in chunked(student_ids):
+        course_ids = db.scalars(
+            enrollment.delete()
+            .where(enrollment.c.student_id.in_(chunk))
+            .returning(enrollment.c.course_id)
+        ).all()
+        release_seats(db, Counter(course_ids))
+        db.execute(
+            update(students_table)
+            .where(students_table.c.id.in_(chunk), students_table.c.credit_load != 0)
+            .values(credit_load=0)
+        )
+        result["enrollments_removed"] += len(course_ids)
+        result["waitlist_removed"] += db.execute(
+            waitlist.delete().where(waitlist.c.student_id.in_(chunk))
+        ).rowcount
+    return result
+
+def clear_course_enrollments(db: Session, course_ids: Iterable[int]) -> Dict[str, int]:
+    """
+    刪除課程的選課與候補記錄，扣減學生的學分負擔並將已選人數歸零，返回刪除的記錄數
+
+    學分從課程表讀取，需在刪除選課記錄之前扣減
+    """
+    result = _result()
+    for chunk in chunked(course_ids):
+        removed = (
+            select(func.coalesce(func.sum(courses_table.c.credits), 0))
+            .select_from(enrollment.join(courses_table, courses_table.c.id == enrollment.c.course_id))
+            .where(enrollment.c.student_id == students_table.c.id, enrollment.c.course_id.in_(chunk))
+            .scalar_subquery()
+        )
+        db.execute(
+            update(students_table)
+            .where(students_table.c.id.in_(
+                select(enrollment.c.student_id).where(enrollment.c.course_id.in_(chunk))
+            ))
+            .values(credit_load=students_table.c.credit_load - removed)
+        )
+        result["enrollments_removed"] += db.execute(
+            enrollment.delete().where(enrollment.c.course_id.in_(chunk))
+        ).rowcount
+        db.execute(
+            update(courses_table)
+            .where(courses_table.c.id.in_(chunk), courses_table.c.enrolled_count != 0)
+            .values(enrolled_count=0)
+        )
+        result["waitlist_removed"] += db.execute(
+            waitlist.delete().where(waitlist.c.course_id.in_(chunk))
+        ).rowcount
+    return result
+
+def deactivate_students(db: Session, student_ids: Iterable[int]) -> Dict[str, int]:
+    """
+    批量停用學生並清空其選課與候補記錄，每批 IN (...) 執行固定數量的語句，由調用方提交事務
+    """
+    student_ids = list(dict.fromkeys(student_ids))
+    result = clear_student_enrollments(db, student_ids)
+    for chunk in chunked(student_ids):
+        result["deactivated"] += db.execute(
+            update(students_table)
+            .where(students_table.c.id.in_(chunk), students_table.c.is_active == True)
+            .values(is_active=False)
+        ).rowcount
+    return result
+
+def deactivate_courses(db: Session, course_ids: Iterable[int]) -> Dict[str, int]:
+    """
+    批量停用課程並清空其選課與候補記錄，每批 IN (...) 執行固定數量的語句，由調用方提交事務
+    """
+    course_ids = list(dict.fromkeys(course_ids))
+    result = clear_course_enrollments(db, course_ids)
+    for chunk in chunked(course_ids):
+        result["deactivated"] += db.execute(
+            update(courses_table)
+            .where(courses_table.c.id.in_(chunk), courses_table.c.is_active == True)
+            .values(is_active=False)
+        ).rowcount
+    return result
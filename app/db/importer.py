@@ -0,0 +1,188 @@
+import argparse
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+from enum import Enum
+from typing import IO, Any, Dict, Iterable, Iterator, List, Sequence, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Table, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import IMPORT_BATCH_SIZE
+from app.db.database import SessionLocal
+from app.db.utils import chunked
+from app.models.models import Course, Student
+from app.schemas.course import CourseCreate
+from app.schemas.student import StudentCreate
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class ImportMode(str, Enum):
+    atomic = "atomic"  # 任一行出錯則整體回滾
+    skip = "skip"  # 跳過錯誤行，其餘按批提交
+
+class ImportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+class ImportSpec:
+    def __init__(self, schema: Type[BaseModel], table: Table, unique_fields: Dict[str, str]):
+        self.schema = schema
+        self.table = table
+        self.unique_fields = unique_fields  # 欄位 -> 錯誤提示中的名稱
+
+IMPORT_SPECS = {
+    "students": ImportSpec(StudentCreate, Student.__table__, {"student_id": "學號", "email": "郵箱"}),
+    "courses": ImportSpec(CourseCreate, Course.__table__, {"course_code": "課程代碼"}),
+}
+
+class InvalidRecord:
+    """
+    無法解析為記錄的行，在導入報告中作為該行的錯誤
+    """
+
+    def __init__(self, message: str):
+        self.message = message
+
+def _parse_json_line(line: str) -> Any:
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as error:
+        return InvalidRecord(f"JSON 格式錯誤：{error.msg}（第 {error.colno} 列）")
+
+def read_records(stream: IO[str], format: ImportFormat) -> Iterator[Any]:
+    """
+    逐行讀取 CSV 或 NDJSON 記錄，空值視為未提供；無法解析的行以 InvalidRecord 返回
+    """
+    if format is ImportFormat.csv:
+        records = csv.DictReader(stream)
+    else:
+        records = (_parse_json_line(line) for line in stream if line.strip())
+    for record in records:
+        if isinstance(record, dict):
+            record = {key: value for key, value in record.items() if value not in ("", None)}
+        yield record
+
+def _record_errors(spec: ImportSpec, record: Any) -> List[str]:
+    # 校驗之前檢查行本身的結構：必須是對象，且只包含模式中的欄位
+    if isinstance(record, InvalidRecord):
+        return [record.message]
+    if not isinstance(record, dict):
+        return ["記錄必須是 JSON 對象"]
+    messages = []
+    if None in record:
+        messages.append("列數多於表頭")
+    unknown = sorted(str(key) for key in record if key is not None and key not in spec.schema.model_fields)
+    if unknown:
+        messages.append(f"未知欄位：{', '.join(unknown)}")
+    return messages
+
+def _validation_messages(error: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(loc) for loc in item['loc'])}: {item['msg']}" for item in error.errors()]
+
+def _existing_values(db: Session, table: Table, field: str, values: Sequence[Any]) -> set:
+    column = table.c[field]
+    existing = set()
+    for chunk in chunked(values):
+        existing.update(db.scalars(select(column).where(column.in_(chunk))))
+    return existing
+
+def import_records(
+    db: Session,
+    entity: str,
+    records: Iterable[Any],
+    mode: ImportMode = ImportMode.skip,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """
+    分批校驗並導入學生或課程記錄
+
+    每批記錄用對應的 Create 模式校驗，文件內重複以及與數據庫中已有記錄的重複
+    均以集合方式一次性檢查，通過的行以 executemany 批量插入
+    """
+    spec = IMPORT_SPECS[entity]
+    seen = {field: set() for field in spec.unique_fields}
+    errors = []
+    total = inserted = 0
+
+    for batch in chunked(enumerate(records, start=1), batch_size):
+        total += len(batch)
+        valid: List[Tuple[int, Dict[str, Any]]] = []
+        for row, record in batch:
+            messages = _record_errors(spec, record)
+            if messages:
+                errors.append({"row": row, "errors": messages})
+                continue
+            try:
+                valid.append((row, spec.schema(**record).model_dump()))
+            except ValidationError as error:
+                errors.append({"row": row, "errors": _validation_messages(error)})
+
+        existing = {
+            field: _existing_values(db, spec.table, field, [data[field] for _, data in valid])
+            for field in spec.unique_fields
+        }
+
+        now = datetime.now()
+        rows = []
+        for row, data in valid:
+            messages = []
+            for field, label in spec.unique_fields.items():
+                if data[field] in existing[field]:
+                    messages.append(f"該{label}已存在")
+                elif data[field] in seen[field]:
+                    messages.append(f"{label}在文件中重複")
+            if messages:
+                errors.append({"row": row, "errors": messages})
+                continue
+            for field in spec.unique_fields:
+                seen[field].add(data[field])
+            rows.append({**data, "created_at": now, "updated_at": now})
+
+        if rows and not (mode is ImportMode.atomic and errors):
+            db.execute(insert(spec.table), rows)
+            inserted += len(rows)
+            if mode is ImportMode.skip:
+                db.commit()
+
+    committed = True
+    if mode is ImportMode.atomic:
+        if errors:
+            db.rollback()
+            inserted = 0
+            committed = False
+        else:
+            db.commit()
+
+    errors.sort(key=lambda item: item["row"])
+    return {"total": total, "inserted": inserted, "committed": committed, "errors": errors}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="從 CSV/NDJSON 文件批量導入學生或課程")
+    parser.add_argument("entity", choices=sorted(IMPORT_SPECS))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=[f.value for f in ImportFormat], help="默認按文件擴展名判斷")
+    parser.add_argument("--mode", choices=[m.value for m in ImportMode], default=ImportMode.skip.value)
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    format = ImportFormat(args.format or ("csv" if args.path.endswith(".csv") else "ndjson"))
+    db = SessionLocal()
+    try:
+        with io.open(args.path, encoding="utf-8-sig", newline="") as stream:
+            report = import_records(
+                db, args.entity, read_records(stream, format), ImportMode(args.mode), args.batch_size
+            )
+    finally:
+        db.close()
+
+    logger.info(f"共 {report['total']} 行，導入 {report['inserted']} 行，錯誤 {len(report['errors'])} 行")
+    for item in report["errors"]:
+        logger.info(f"第 {item['row']} 行：{'；'.join(item['errors'])}")
+
+if __name__ == "__main__":
+    main()
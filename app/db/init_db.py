@@ -1,18 +1,120 @@
+import hashlib
 import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
 from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex, CreateTable
 
+from app.db import search  # noqa: F401  註冊全文檢索表，隨 create_all 一併創建
 from app.db.database import Base, engine
+from app.db.seats import reconcile_aggregates
 from app.models import models
-from app.core.config import DATABASE_URL
+from app.core.config import BASE_DIR, DATABASE_URL, SCHEMA_SYNC_MODE
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def init_db() -> None:
-    # 創建所有表
+# 由應用維護的統計欄位：(表名, 欄位名)
+AGGREGATE_COLUMNS = [
+    ("courses", "enrolled_count"),
+    ("students", "credit_load"),
+]
+
+def _ensure_aggregate_columns(bind) -> None:
+    # 舊數據庫缺少統計欄位時補上，並根據選課表回填
+    inspector = inspect(bind)
+    missing = [
+        (table, column) for table, column in AGGREGATE_COLUMNS
+        if column not in {info["name"] for info in inspector.get_columns(table)}
+    ]
+    if not missing:
+        return
+    with bind.begin() as conn:
+        for table, column in missing:
+            logger.info(f"為 {table} 表添加 {column} 欄位")
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"))
+    with Session(bind=bind) as db:
+        reconcile_aggregates(db)
+
+def _ensure_indexes(bind) -> None:
+    # create_all 不會為已存在的表補建新增的索引
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind, checkfirst=True)
+
+# 保存已應用的數據庫結構指紋的表，不屬於 Base.metadata
+SCHEMA_VERSION_TABLE = "schema_version"
+
+ALEMBIC_INI = BASE_DIR / "alembic.ini"
+
+def schema_fingerprint(bind) -> str:
+    """
+    根據模型生成的 DDL、全文檢索表和統計欄位計算結構指紋，模型有任何變化指紋都會改變
+    """
+    parts = []
+    for table in Base.metadata.sorted_tables:
+        parts.append(str(CreateTable(table).compile(dialect=bind.dialect)))
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            parts.append(str(CreateIndex(index).compile(dialect=bind.dialect)))
+    for fts, (source, columns, _) in sorted(search.SEARCH_TABLES.items()):
+        parts.append(f"{fts}:{source}:{','.join(columns)}")
+    parts.append(repr(AGGREGATE_COLUMNS))
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+def _stored_fingerprint(bind) -> Optional[str]:
+    # 單條查詢讀取指紋，表不存在（新數據庫或舊版本）時返回 None
+    try:
+        with bind.connect() as conn:
+            return conn.execute(text(f"SELECT fingerprint FROM {SCHEMA_VERSION_TABLE}")).scalar()
+    except (OperationalError, ProgrammingError):
+        return None
+
+def _store_fingerprint(bind, fingerprint: str) -> None:
+    with bind.begin() as conn:
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {SCHEMA_VERSION_TABLE} "
+            "(fingerprint VARCHAR(64) NOT NULL, applied_at TIMESTAMP NOT NULL)"
+        ))
+        conn.execute(text(f"DELETE FROM {SCHEMA_VERSION_TABLE}"))
+        conn.execute(
+            text(f"INSERT INTO {SCHEMA_VERSION_TABLE} (fingerprint, applied_at) VALUES (:fingerprint, :applied_at)"),
+            {"fingerprint": fingerprint, "applied_at": datetime.now()},
+        )
+
+def _run_migrations() -> bool:
+    # 存在 alembic.ini 時交給 Alembic 執行遷移，否則使用 create_all
+    if not ALEMBIC_INI.exists():
+        return False
+    from alembic import command
+    from alembic.config import Config
+
+    logger.info("使用 Alembic 遷移數據庫結構")
+    command.upgrade(Config(str(ALEMBIC_INI)), "head")
+    return True
+
+def init_db(mode: str = SCHEMA_SYNC_MODE) -> bool:
+    """
+    確保數據庫結構與模型一致，返回是否執行了 DDL
+
+    fingerprint 模式下數據庫中保存的結構指紋與當前模型一致時直接跳過，不反射、不建表；
+    always 模式每次都執行 create_all
+    """
+    fingerprint = schema_fingerprint(engine)
+    if mode == "fingerprint" and _stored_fingerprint(engine) == fingerprint:
+        logger.info("數據庫結構指紋一致，跳過建表")
+        return False
+
     logger.info(f"正在創建數據庫表，連接至 {DATABASE_URL}")
-    Base.metadata.create_all(bind=engine)
+    if not _run_migrations():
+        Base.metadata.create_all(bind=engine)
+        _ensure_aggregate_columns(engine)
+        _ensure_indexes(engine)
+    _store_fingerprint(engine, fingerprint)
     logger.info("數據庫表創建完成")
+    return True
 
 if __name__ == "__main__":
-    init_db() 
\ No newline at end of file
+    init_db()
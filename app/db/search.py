@@ -0,0 +1,108 @@
+import logging
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+from app.db.database import Base, SessionLocal
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 全文檢索表：(檢索表名, 源表名, 檢索欄位, 各欄位的 bm25 權重)
+# 使用 trigram 分詞器按字元三元組建立索引，不依賴空格分詞，中文姓名與課程名稱也能做子串匹配
+SEARCH_TABLES: Dict[str, Tuple[str, List[str], List[float]]] = {
+    "students_fts": ("students", ["name", "student_id", "email"], [10.0, 5.0, 1.0]),
+    "courses_fts": ("courses", ["course_code", "title", "description"], [5.0, 10.0, 1.0]),
+}
+
+# trigram 分詞器要求查詢至少包含三個字元，更短的查詢改用前綴匹配
+MIN_FTS_QUERY_LENGTH = 3
+
+def _ddl(fts: str, source: str, columns: List[str]) -> List[str]:
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {source} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END",
+        # 只在檢索欄位變化時重建索引，避免選課人數等頻繁更新帶來額外寫入
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {source} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+    ]
+
+@event.listens_for(Base.metadata, "after_create")
+def create_search_tables(target, connection, **kw) -> None:
+    """
+    創建表後建立 FTS5 檢索表與同步觸發器，新建的檢索表會從源表回填
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    for fts, (source, columns, _) in SEARCH_TABLES.items():
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,)
+        ).scalar()
+        try:
+            if not exists:
+                connection.exec_driver_sql(
+                    f"CREATE VIRTUAL TABLE {fts} USING fts5({', '.join(columns)}, "
+                    f"content='{source}', content_rowid='id', tokenize='trigram')"
+                )
+                connection.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+            for statement in _ddl(fts, source, columns):
+                connection.exec_driver_sql(statement)
+        except OperationalError:
+            logger.warning(f"當前 SQLite 不支持 FTS5 trigram 分詞器，{fts} 未創建，搜索將只使用前綴匹配")
+            return
+
+@event.listens_for(Base.metadata, "before_drop")
+def drop_search_tables(target, connection, **kw) -> None:
+    if connection.dialect.name != "sqlite":
+        return
+    for fts in SEARCH_TABLES:
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {fts}")
+
+def _existing_search_tables(connection) -> List[str]:
+    if connection.dialect.name != "sqlite":
+        return []
+    return [
+        fts for fts in SEARCH_TABLES
+        if connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,)
+        ).scalar()
+    ]
+
+@contextmanager
+def bulk_load(connection):
+    """
+    大批量寫入源表期間暫停插入觸發器，結束後一次性重建檢索索引，比逐行維護快一個數量級
+    """
+    tables = _existing_search_tables(connection)
+    for fts in tables:
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {fts}_ai")
+    yield
+    for fts in tables:
+        source, columns, _ = SEARCH_TABLES[fts]
+        for statement in _ddl(fts, source, columns):
+            connection.exec_driver_sql(statement)
+        connection.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+def rebuild_search_index(db) -> None:
+    """
+    根據源表重建全部檢索索引
+    """
+    for fts in SEARCH_TABLES:
+        db.connection().exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+    db.commit()
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        rebuild_search_index(db)
+        logger.info("全文檢索索引重建完成")
+    finally:
+        db.close()
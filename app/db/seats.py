@@ -0,0 +1,176 @@
+import logging
+from collections import Counter
+from typing import Dict, Iterable, Mapping, Tuple, Union
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal
+from app.models.models import Course, Student, enrollment
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+courses_table = Course.__table__
+students_table = Student.__table__
+
+def is_enrolled(db: Session, student_id: int, course_id: int) -> bool:
+    """
+    學生是否已選修該課程
+    """
+    stmt = select(enrollment.c.course_id).where(
+        enrollment.c.student_id == student_id,
+        enrollment.c.course_id == course_id
+    )
+    return db.scalar(stmt) is not None
+
+def reserve_seat(db: Session, course_id: int, count: int = 1) -> bool:
+    """
+    以條件更新原子地佔用課程名額，僅在剩餘名額足夠時成功
+    """
+    stmt = (
+        update(courses_table)
+        .where(
+            courses_table.c.id == course_id,
+            courses_table.c.is_active == True,
+            courses_table.c.enrolled_count + count <= courses_table.c.max_students,
+        )
+        .values(enrolled_count=courses_table.c.enrolled_count + count)
+    )
+    return db.execute(stmt).rowcount == 1
+
+def reserve_seats(db: Session, course_id: int, count: int) -> int:
+    """
+    佔用最多 count 個名額（不足時佔滿剩餘名額），返回實際佔用數；語句數與 count 無關
+
+    SQLite 的 RETURNING 只能返回更新後的值，無從得知實際佔用了多少，因此先讀取當前人數，
+    再以「人數未變」為條件更新（比較並交換）；期間被並發寫入改變時重新讀取
+    """
+    if count <= 0:
+        return 0
+    while True:
+        course = db.execute(
+            select(courses_table.c.enrolled_count, courses_table.c.max_students)
+            .where(courses_table.c.id == course_id, courses_table.c.is_active == True)
+        ).first()
+        if course is None or course.max_students is None:
+            return 0
+        granted = min(count, course.max_students - course.enrolled_count)
+        if granted <= 0:
+            return 0
+        reserved = db.execute(
+            update(courses_table)
+            .where(
+                courses_table.c.id == course_id,
+                courses_table.c.is_active == True,
+                courses_table.c.enrolled_count == course.enrolled_count,
+            )
+            .values(enrolled_count=course.enrolled_count + granted)
+            .returning(courses_table.c.enrolled_count)
+        ).first()
+        if reserved is not None:
+            return granted
+
+def release_seats(db: Session, course_ids: Union[Mapping[int, int], Iterable[int]]) -> None:
+    """
+    釋放課程名額，可傳入課程ID序列（每出現一次釋放一個名額）或 {課程ID: 數量}
+    """
+    counts = course_ids if isinstance(course_ids, Mapping) else Counter(course_ids)
+    if not counts:
+        return
+    stmt = (
+        update(courses_table)
+        .where(courses_table.c.id == bindparam("b_course_id"))
+        .values(enrolled_count=courses_table.c.enrolled_count - bindparam("b_count"))
+    )
+    db.execute(stmt, [{"b_course_id": course_id, "b_count": count} for course_id, count in counts.items()])
+
+def adjust_credit_load(db: Session, pairs: Iterable[Tuple[int, int]], sign: int = 1) -> None:
+    """
+    按 (學生ID, 課程ID) 增加（sign=1）或扣減（sign=-1）學生的學分負擔，學分取自課程當前設定
+    """
+    params = [{"b_student_id": student_id, "b_course_id": course_id} for student_id, course_id in pairs]
+    if not params:
+        return
+    credits = (
+        select(func.coalesce(courses_table.c.credits, 0))
+        .where(courses_table.c.id == bindparam("b_course_id"))
+        .scalar_subquery()
+    )
+    stmt = (
+        update(students_table)
+        .where(students_table.c.id == bindparam("b_student_id"))
+        .values(credit_load=students_table.c.credit_load + sign * credits)
+    )
+    db.execute(stmt, params)
+
+def apply_course_credits(db: Session, course_id: int, credits: int) -> None:
+    """
+    課程學分變更時，按新舊學分差同步調整所有已選該課程學生的學分負擔
+
+    舊學分從課程表讀取，需在更新課程之前執行
+    """
+    previous = (
+        select(func.coalesce(courses_table.c.credits, 0))
+        .where(courses_table.c.id == course_id)
+        .scalar_subquery()
+    )
+    db.execute(
+        update(students_table)
+        .where(students_table.c.id.in_(
+            select(enrollment.c.student_id).where(enrollment.c.course_id == course_id)
+        ))
+        .values(credit_load=students_table.c.credit_load + ((credits or 0) - previous))
+    )
+
+def reconcile_enrolled_counts(db: Session) -> int:
+    """
+    根據選課表重新計算所有課程的已選人數，返回被修正的課程數
+    """
+    actual = (
+        select(func.count())
+        .where(enrollment.c.course_id == courses_table.c.id)
+        .scalar_subquery()
+    )
+    result = db.execute(
+        update(courses_table)
+        .where(courses_table.c.enrolled_count.is_distinct_from(actual))
+        .values(enrolled_count=actual)
+    )
+    db.commit()
+    return result.rowcount
+
+def reconcile_credit_loads(db: Session) -> int:
+    """
+    根據選課表重新計算所有學生的學分負擔，返回被修正的學生數
+    """
+    actual = (
+        select(func.coalesce(func.sum(courses_table.c.credits), 0))
+        .select_from(enrollment.join(courses_table, courses_table.c.id == enrollment.c.course_id))
+        .where(enrollment.c.student_id == students_table.c.id)
+        .scalar_subquery()
+    )
+    result = db.execute(
+        update(students_table)
+        .where(students_table.c.credit_load.is_distinct_from(actual))
+        .values(credit_load=actual)
+    )
+    db.commit()
+    return result.rowcount
+
+def reconcile_aggregates(db: Session) -> Dict[str, int]:
+    """
+    全量重算所有維護中的統計欄位，返回各欄位被修正的行數
+    """
+    return {
+        "enrolled_count": reconcile_enrolled_counts(db),
+        "credit_load": reconcile_credit_loads(db),
+    }
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        fixed = reconcile_aggregates(db)
+        logger.info(f"已修正 {fixed['enrolled_count']} 門課程的選課人數、{fixed['credit_load']} 個學生的學分負擔")
+    finally:
+        db.close()
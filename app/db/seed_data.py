@@ -1,10 +1,18 @@
+import argparse
+import bisect
+import itertools
 import logging
+import time
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 from datetime import datetime
 import random
 
-from app.db.database import SessionLocal
-from app.models.models import Student, Course
+from app.db.database import SessionLocal, engine as default_engine
+from app.db.search import bulk_load
+from app.db.utils import chunked
+from app.models.models import Student, Course, enrollment
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -54,6 +62,7 @@ def seed_db():
                 phone=student_data["phone"],
                 created_at=datetime.now(),
                 updated_at=datetime.now(),
+                credit_load=0,
                 is_active=True
             )
             db.add(student)
@@ -69,6 +78,7 @@ def seed_db():
                 description=course_data["description"],
                 credits=course_data["credits"],
                 max_students=course_data["max_students"],
+                enrolled_count=0,
                 created_at=datetime.now(),
                 updated_at=datetime.now(),
                 is_active=True
@@ -88,6 +98,8 @@ def seed_db():
             
             for course in chosen_courses:
                 student.courses.append(course)
+                course.enrolled_count += 1
+                student.credit_load += course.credits
                 logger.info(f"學生 {student.name} 選修了 {course.title}")
         
         # 提交所有變更
@@ -104,5 +116,165 @@ def seed_db():
     finally:
         db.close()
 
+# 大規模數據生成：每批插入的行數
+GENERATE_BATCH_SIZE = 50_000
+
+# 課程熱度服從 Zipf 分佈，指數越大熱門課程越集中
+POPULARITY_SKEW = 0.8
+
+# 課程容量相對預期選課人數的餘量，保證數據生成後仍有空位可選
+CAPACITY_HEADROOM = 1.25
+
+SURNAMES = "王李張劉陳楊黃趙吳周徐孫馬朱胡郭何林高羅"
+GIVEN_NAMES = "明華偉芳敏靜麗強磊軍洋勇艷杰娟濤超秀英慧建平剛桂文輝玲"
+DEPARTMENTS = [
+    ("CS", "計算機"), ("MA", "數學"), ("PH", "物理"), ("EE", "電機"),
+    ("BI", "生物"), ("EC", "經濟"), ("HI", "歷史"), ("LI", "文學"),
+]
+TOPICS = ["導論", "基礎", "進階", "專題", "實驗", "研討", "方法", "應用"]
+
+def _popularity(courses: int) -> list:
+    # 課程 ID 即熱度排名，ID 越小越熱門；返回累積權重供加權抽樣
+    return list(itertools.accumulate(1 / rank ** POPULARITY_SKEW for rank in range(1, courses + 1)))
+
+def _has_data(engine: Engine) -> bool:
+    with engine.connect() as conn:
+        return any(
+            conn.execute(select(func.count()).select_from(table)).scalar()
+            for table in (Student.__table__, Course.__table__)
+        )
+
+class _BulkInserter:
+    """
+    預先編譯插入語句與固定值的類型轉換，按行元組直接交給驅動批量執行，
+    避免 SQLAlchemy 為每行字典重複處理參數
+    """
+    def __init__(self, conn, table, columns):
+        compiled = insert(table).compile(dialect=conn.dialect, column_keys=columns)
+        self.conn = conn
+        self.sql = compiled.string
+        self.positions = [columns.index(name) for name in compiled.positiontup]
+
+    def execute(self, rows: list) -> None:
+        if rows:
+            positions = self.positions
+            self.conn.exec_driver_sql(self.sql, [tuple(row[i] for i in positions) for row in rows])
+
+def _bind(conn, column, value):
+    # 將固定值按欄位類型轉換為驅動可接受的形式，每次生成只轉換一次
+    processor = column.type.dialect_impl(conn.dialect).bind_processor(conn.dialect)
+    return processor(value) if processor else value
+
+def generate(engine: Engine, students: int, courses: int, avg_enrollments: float,
+             seed: int = 42, batch_size: int = GENERATE_BATCH_SIZE) -> dict:
+    """
+    以 Core 批量插入生成大規模模擬數據，相同參數與種子生成的數據完全一致
+    """
+    rng = random.Random(seed)
+    cum_weights = _popularity(courses)
+    total_weight = cum_weights[-1]
+    expected = students * avg_enrollments
+    course_ids = range(1, courses + 1)
+
+    # 容量按預期選課人數加上餘量分配，熱門課程容量更大
+    capacity = [0] + [
+        max(10, int(expected * (cum_weights[i] - (cum_weights[i - 1] if i else 0)) / total_weight * CAPACITY_HEADROOM) + 1)
+        for i in range(courses)
+    ]
+    counts = [0] * (courses + 1)
+    base, fraction = int(avg_enrollments), avg_enrollments - int(avg_enrollments)
+    spread = min(2, base)
+    courses_table, students_table = Course.__table__, Student.__table__
+
+    with engine.begin() as conn, bulk_load(conn):
+        if conn.dialect.name == "sqlite":
+            # 加大頁緩存，減少大批量寫入時索引頁的換入換出
+            conn.exec_driver_sql("PRAGMA cache_size = -262144")
+        now = _bind(conn, courses_table.c.created_at, datetime.now())
+        active = _bind(conn, courses_table.c.is_active, True)
+
+        inserter = _BulkInserter(conn, courses_table, [
+            "id", "course_code", "title", "description", "credits", "max_students",
+            "enrolled_count", "created_at", "updated_at", "is_active",
+        ])
+        credits = [0] * (courses + 1)
+        for batch in chunked(course_ids, batch_size):
+            rows = []
+            for i in batch:
+                code, department = DEPARTMENTS[i % len(DEPARTMENTS)]
+                topic = TOPICS[rng.randrange(len(TOPICS))]
+                credits[i] = rng.randint(1, 4)
+                rows.append((i, f"{code}{i:05d}", f"{department}{topic}{i}", f"{department}系{topic}課程",
+                             credits[i], capacity[i], 0, now, now, active))
+            inserter.execute(rows)
+
+        student_inserter = _BulkInserter(conn, students_table, [
+            "id", "student_id", "name", "email", "phone", "created_at", "updated_at", "is_active", "credit_load",
+        ])
+        enrollment_inserter = _BulkInserter(conn, enrollment, [
+            "student_id", "course_id", "enrollment_date", "is_active",
+        ])
+        enrollments = 0
+        for batch in chunked(range(1, students + 1), batch_size):
+            student_rows = [
+                [i, f"S{i:08d}", SURNAMES[rng.randrange(len(SURNAMES))] + "".join(rng.choices(GIVEN_NAMES, k=rng.randint(1, 2))),
+                 f"s{i:08d}@example.com", f"09{rng.randrange(10 ** 8):08d}", now, now, active, 0]
+                for i in batch
+            ]
+            rows = []
+            for student_row in student_rows:
+                student_id = student_row[0]
+                # 選課數以平均值為中心均勻分佈
+                wanted = min(courses, rng.randint(base - spread, base + spread) + (rng.random() < fraction))
+                chosen = set()
+                # 按熱度加權抽樣，跳過已滿或已選的課程；抽樣次數有上限，避免課程幾乎全滿時死循環
+                for _ in range(wanted * 4):
+                    if len(chosen) >= wanted:
+                        break
+                    course_id = bisect.bisect(cum_weights, rng.random() * total_weight) + 1
+                    if course_id > courses or course_id in chosen or counts[course_id] >= capacity[course_id]:
+                        continue
+                    chosen.add(course_id)
+                    counts[course_id] += 1
+                    student_row[-1] += credits[course_id]
+                    rows.append((student_id, course_id, now, active))
+            student_inserter.execute(student_rows)
+            enrollment_inserter.execute(rows)
+            enrollments += len(rows)
+
+        stmt = (
+            update(courses_table)
+            .where(courses_table.c.id == bindparam("b_id"))
+            .values(enrolled_count=bindparam("b_count"))
+        )
+        for batch in chunked(course_ids, batch_size):
+            params = [{"b_id": i, "b_count": counts[i]} for i in batch if counts[i]]
+            if params:
+                conn.execute(stmt, params)
+
+    return {"students": students, "courses": courses, "enrollments": enrollments}
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="填充示例數據，或按指定規模生成模擬數據")
+    parser.add_argument("--students", type=int, help="生成的學生數，不指定時只插入少量示例數據")
+    parser.add_argument("--courses", type=int, default=1000, help="生成的課程數")
+    parser.add_argument("--avg-enrollments", type=float, default=5.0, help="每個學生平均選課數")
+    parser.add_argument("--seed", type=int, default=42, help="隨機種子")
+    parser.add_argument("--batch-size", type=int, default=GENERATE_BATCH_SIZE, help="每批插入的行數")
+    args = parser.parse_args(argv)
+
+    if args.students is None:
+        seed_db()
+        return
+    if _has_data(default_engine):
+        logger.info("數據庫已有數據，跳過數據生成。如需重新生成，請先清空數據")
+        return
+    start = time.perf_counter()
+    result = generate(default_engine, args.students, args.courses, args.avg_enrollments, args.seed, args.batch_size)
+    logger.info(
+        f"已生成 {result['students']} 個學生、{result['courses']} 門課程、"
+        f"{result['enrollments']} 條選課記錄，耗時 {time.perf_counter() - start:.1f}s"
+    )
+
 if __name__ == "__main__":
-    seed_db() 
\ No newline at end of file
+    main() 
\ No newline at end of file
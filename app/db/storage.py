@@ -0,0 +1,107 @@
+import asyncio
+import functools
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Mapping
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.config import SQLITE_BUSY_BACKOFF, SQLITE_BUSY_RETRIES
+from app.core.metrics import Counter, registry
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SQLITE_BUSY_RETRIED = registry.register(Counter(
+    "sqlite_busy_retries_total", "寫入因 SQLITE_BUSY 回滾重試的次數", ["endpoint"]))
+
+def is_sqlite(engine: Engine) -> bool:
+    return engine.dialect.name == "sqlite"
+
+def configure_sqlite(engine: Engine, pragmas: Mapping[str, Any]) -> None:
+    """
+    在每個新建立的 SQLite 連接上執行存儲配置中的 PRAGMA
+    """
+    if not pragmas or not is_sqlite(engine):
+        return
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+def effective_pragmas(engine: Engine, names) -> Dict[str, Any]:
+    """
+    讀取當前連接上實際生效的 PRAGMA 值
+    """
+    with engine.connect() as conn:
+        return {name: conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in names}
+
+def run_maintenance(engine: Engine) -> None:
+    """
+    執行 WAL 檢查點並讓 SQLite 更新查詢規劃統計信息
+    """
+    if not is_sqlite(engine):
+        return
+    with engine.connect() as conn:
+        if conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal":
+            busy, log_frames, checkpointed = conn.exec_driver_sql("PRAGMA wal_checkpoint(PASSIVE)").one()
+            logger.debug(f"WAL 檢查點：{checkpointed}/{log_frames} 頁")
+        conn.exec_driver_sql("PRAGMA optimize")
+
+def is_busy_error(exc: OperationalError) -> bool:
+    # SQLITE_BUSY / SQLITE_LOCKED 的錯誤信息為 "database is locked" 或 "database table is locked"
+    return "is locked" in str(exc.orig) or "busy" in str(exc.orig).lower()
+
+def _backoff(attempt: int) -> float:
+    # 退避時間逐次翻倍，帶隨機抖動
+    return SQLITE_BUSY_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.0)
+
+def retry_on_busy(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    寫入端點遇到 SQLITE_BUSY 時回滾並重新執行，退避時間逐次翻倍（帶隨機抖動），超過重試次數後拋出原錯誤
+
+    busy_timeout 只能等待鎖釋放；WAL 模式下讀事務升級為寫事務時若快照已過期會立即返回 SQLITE_BUSY，
+    只能回滾後從頭重試。異步模式下端點在事件循環上執行，不能用 time.sleep 退避，
+    async_routes 會取出原端點並改用 retry_on_busy_async
+    """
+    @functools.wraps(endpoint)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        for attempt in range(SQLITE_BUSY_RETRIES + 1):
+            try:
+                return endpoint(*args, **kwargs)
+            except OperationalError as exc:
+                if attempt == SQLITE_BUSY_RETRIES or not is_busy_error(exc):
+                    raise
+                for value in kwargs.values():
+                    if isinstance(value, Session):
+                        value.rollback()
+                SQLITE_BUSY_RETRIED.inc(endpoint.__name__)
+                time.sleep(_backoff(attempt))
+
+    wrapper.busy_retry_endpoint = endpoint
+    return wrapper
+
+async def retry_on_busy_async(
+    name: str, call: Callable[[], Awaitable[Any]], rollback: Callable[[], Awaitable[None]]
+) -> Any:
+    """
+    retry_on_busy 的異步版本：以 asyncio.sleep 退避，重試期間不阻塞事件循環
+    """
+    for attempt in range(SQLITE_BUSY_RETRIES + 1):
+        try:
+            return await call()
+        except OperationalError as exc:
+            if attempt == SQLITE_BUSY_RETRIES or not is_busy_error(exc):
+                raise
+            await rollback()
+            SQLITE_BUSY_RETRIED.inc(name)
+            await asyncio.sleep(_backoff(attempt))
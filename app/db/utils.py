@@ -0,0 +1,47 @@
+from itertools import islice
+from typing import Iterable, Iterator, List, Mapping, Optional, TypeVar
+
+from sqlalchemy import and_
+from sqlalchemy.exc import IntegrityError
+
+T = TypeVar("T")
+
+# 單條 IN (...) 語句的參數上限，避免超出 SQLite 的綁定變量限制
+IN_CLAUSE_CHUNK_SIZE = 500
+
+def chunked(items: Iterable[T], size: int = IN_CLAUSE_CHUNK_SIZE) -> Iterator[List[T]]:
+    """
+    將可迭代對象按固定大小切分
+    """
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def prefix_range(column, prefix: str):
+    """
+    將前綴匹配轉換為索引可用的範圍條件：column >= prefix AND column < 下一個前綴
+    """
+    # 最後一個字符無法遞增（U+10FFFF）時去掉它並遞增前一個字符；跳過代理區，避免生成無法編碼的字符
+    stem = prefix
+    while stem:
+        code = ord(stem[-1]) + 1
+        if 0xD800 <= code <= 0xDFFF:
+            code = 0xE000
+        if code <= 0x10FFFF:
+            return and_(column >= prefix, column < stem[:-1] + chr(code))
+        stem = stem[:-1]
+    # 全部由 U+10FFFF 組成時沒有上界
+    return column >= prefix
+
+def unique_violation(exc: IntegrityError, messages: Mapping[str, str]) -> Optional[str]:
+    """
+    根據違反唯一約束的列返回對應的錯誤信息，不是已知的唯一約束時返回 None
+    """
+    text = str(exc.orig)
+    for column, message in messages.items():
+        if column in text:
+            return message
+    return None
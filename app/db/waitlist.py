@@ -0,0 +1,138 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import WAITLIST_BATCH_SIZE
+from app.core.metrics import Counter, registry
+from app.core.singleflight import read_coalescer
+from app.db.database import SessionLocal
+from app.db.seats import adjust_credit_load, reserve_seats
+from app.models.models import Course, Student, enrollment, waitlist
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+courses_table = Course.__table__
+
+WAITLIST_PROMOTIONS = registry.register(Counter(
+    "waitlist_promotions_total", "從候補名單遞補選課的人數"))
+
+class PromotionSignal:
+    """
+    喚醒遞補任務的信號，可在線程池中的同步端點裡安全調用 notify
+    """
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._event: Optional[asyncio.Event] = None
+
+    def bind(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+
+    def unbind(self) -> None:
+        self._loop = self._event = None
+
+    def notify(self) -> None:
+        # 遞補任務未啟動時（如測試或命令行）忽略
+        loop, event = self._loop, self._event
+        if loop is not None and event is not None:
+            loop.call_soon_threadsafe(event.set)
+
+    async def wait(self, timeout: float) -> None:
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._event.clear()
+
+promotion_signal = PromotionSignal()
+
+def waitlist_position(db: Session, entry_id: int, course_id: int) -> int:
+    """
+    計算候補記錄在課程候補名單中的位置，只在 course_id 索引上計數
+    """
+    return db.scalar(
+        select(func.count()).where(waitlist.c.course_id == course_id, waitlist.c.id <= entry_id)
+    )
+
+def _promote_course(db: Session, course_id: int, limit: int) -> Tuple[int, int]:
+    """
+    按先來後到遞補一門課程的候補學生（單一事務），返回 (遞補人數, 處理的候補記錄數)
+    """
+    entries = db.execute(
+        select(waitlist.c.id, waitlist.c.student_id, Student.is_active)
+        .join(Student, Student.id == waitlist.c.student_id)
+        .where(waitlist.c.course_id == course_id)
+        .order_by(waitlist.c.id)
+        .limit(limit)
+    ).all()
+    if not entries:
+        return 0, 0
+
+    enrolled = set(db.scalars(
+        select(enrollment.c.student_id).where(
+            enrollment.c.course_id == course_id,
+            enrollment.c.student_id.in_([entry.student_id for entry in entries]),
+        )
+    ))
+    # 已停用或已直接選上該課程的學生只移出候補名單
+    candidates = [entry for entry in entries if entry.is_active and entry.student_id not in enrolled]
+
+    granted = reserve_seats(db, course_id, len(candidates))
+    promoted = candidates[:granted]
+    waiting = {entry.id for entry in candidates[granted:]}
+    removed = [entry.id for entry in entries if entry.id not in waiting]
+
+    if promoted:
+        now = datetime.now()
+        db.execute(enrollment.insert(), [
+            {"student_id": entry.student_id, "course_id": course_id, "enrollment_date": now, "is_active": True}
+            for entry in promoted
+        ])
+        adjust_credit_load(db, [(entry.student_id, course_id) for entry in promoted])
+    if removed:
+        db.execute(delete(waitlist).where(waitlist.c.id.in_(removed)))
+    db.commit()
+    if promoted:
+        read_coalescer.forget("roster")
+    return len(promoted), len(removed)
+
+def promote_waitlist(db: Session, batch_size: int = WAITLIST_BATCH_SIZE) -> int:
+    """
+    為所有有空位且有人候補的課程遞補學生，每門課程每批一個事務，返回遞補人數
+    """
+    total = 0
+    while True:
+        courses = db.execute(
+            select(waitlist.c.course_id, courses_table.c.max_students - courses_table.c.enrolled_count)
+            .join(courses_table, courses_table.c.id == waitlist.c.course_id)
+            .where(
+                courses_table.c.is_active == True,
+                courses_table.c.enrolled_count < courses_table.c.max_students,
+            )
+            .group_by(waitlist.c.course_id)
+        ).all()
+        processed = 0
+        for course_id, free in courses:
+            promoted, handled = _promote_course(db, course_id, min(free, batch_size))
+            total += promoted
+            processed += handled
+        if not processed:
+            break
+    if total:
+        WAITLIST_PROMOTIONS.inc(amount=total)
+    return total
+
+def run_promotion() -> int:
+    db = SessionLocal()
+    try:
+        return promote_waitlist(db)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    logger.info(f"已從候補名單遞補 {run_promotion()} 人")
@@ -1,17 +1,105 @@
-from fastapi import FastAPI
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
+import logging
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 from app.api.api import api_router
-from app.core.config import API_V1_STR, PROJECT_NAME
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.core.config import (
+    API_V1_STR,
+    PROJECT_NAME,
+    SQLITE_MAINTENANCE_INTERVAL,
+    SQLITE_PRAGMAS,
+    SQLITE_STORAGE_PROFILE,
+    WAITLIST_PROMOTION_INTERVAL,
+)
+from app.core import process_lock
+from app.core.metrics import MetricsMiddleware, registry, startup_report
+from app.db import database
 from app.db.init_db import init_db
+from app.db.storage import effective_pragmas, is_sqlite, run_maintenance
+from app.db.waitlist import promotion_signal, run_promotion
+
+logger = logging.getLogger(__name__)
+
+# 非後台任務進程嘗試接替的間隔（秒）
+LEADER_POLL_INTERVAL = 5.0
+
+# 導入應用及其依賴（FastAPI、SQLAlchemy、Pydantic 等）的耗時
+startup_report.record("import", time.perf_counter() - _import_started)
+
+async def sqlite_maintenance(interval: int):
+    # 定期執行 WAL 檢查點與 PRAGMA optimize
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(run_maintenance, database.engine)
+        except Exception:
+            logger.exception("SQLite 維護任務執行失敗")
+
+async def waitlist_worker(interval: float):
+    # 釋放名額時被喚醒，並定期掃描一次，兜底其他進程釋放的名額
+    promotion_signal.bind()
+    try:
+        while True:
+            await promotion_signal.wait(interval)
+            try:
+                promoted = await asyncio.to_thread(run_promotion)
+                if promoted:
+                    logger.info(f"已從候補名單遞補 {promoted} 人")
+            except Exception:
+                logger.exception("候補遞補任務執行失敗")
+    finally:
+        promotion_signal.unbind()
+
+async def background_tasks():
+    # 多工作進程時只由持有鎖的一個進程執行維護與遞補，該進程退出後由其他進程接替
+    lock = process_lock.try_hold("background")
+    while lock is None:
+        await asyncio.sleep(LEADER_POLL_INTERVAL)
+        lock = process_lock.try_hold("background")
+
+    tasks = []
+    if is_sqlite(database.engine) and SQLITE_MAINTENANCE_INTERVAL > 0:
+        tasks.append(sqlite_maintenance(SQLITE_MAINTENANCE_INTERVAL))
+    if WAITLIST_PROMOTION_INTERVAL > 0:
+        tasks.append(waitlist_worker(WAITLIST_PROMOTION_INTERVAL))
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        lock.close()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # 初始化數據庫（在啟動時執行）
-    init_db()
+    # 初始化數據庫（在啟動時執行），結構指紋一致時跳過建表；
+    # 多工作進程時依次執行，第一個進程建表後其餘進程的指紋檢查直接通過
+    started = time.perf_counter()
+    with process_lock.exclusive("init_db"):
+        init_db()
+    startup_report.record("db_init", time.perf_counter() - started)
+    logger.info(f"應用已就緒：{startup_report.summary()}")
+
+    if is_sqlite(database.engine):
+        pragmas = effective_pragmas(database.engine, SQLITE_PRAGMAS or ["journal_mode", "synchronous"])
+        logger.info(f"SQLite 存儲配置 {SQLITE_STORAGE_PROFILE}，生效的 PRAGMA：{pragmas}")
+
+    background = asyncio.create_task(background_tasks())
+
     yield
 
+    # 等待後台任務退出：維護與遞補停止後才釋放鎖，並在其不再使用連接後關閉引擎
+    background.cancel()
+    with suppress(asyncio.CancelledError):
+        await background
+    if database.async_engine is not None:
+        await database.async_engine.dispose()
+
 app = FastAPI(
     title=PROJECT_NAME,
     description="提供學生、課程管理和選課功能的後端服務",
@@ -26,11 +114,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# 請求指標
+app.add_middleware(MetricsMiddleware)
+
 # 包含API路由
 app.include_router(api_router, prefix=API_V1_STR)
 
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    return Response(content=registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
     return {"message": f"歡迎使用{PROJECT_NAME} API", "docs_url": "/docs"}
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Table
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, String, DateTime, Table, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -12,6 +12,19 @@ enrollment = Table(
     Column("course_id", Integer, ForeignKey("courses.id"), primary_key=True),
     Column("enrollment_date", DateTime, default=datetime.now),
     Column("is_active", Boolean, default=True),
+    # 主鍵以 student_id 開頭，按課程查詢名單、釋放名額時需要以 course_id 開頭的索引
+    Index("ix_enrollment_course_student", "course_id", "student_id"),
+)
+
+# 候補名單：課程額滿時排隊，自增 ID 即先來後到的順序
+waitlist = Table(
+    "waitlist",
+    Base.metadata,
+    Column("id", Integer, primary_key=True),
+    Column("student_id", Integer, ForeignKey("students.id"), nullable=False),
+    Column("course_id", Integer, ForeignKey("courses.id"), nullable=False, index=True),
+    Column("created_at", DateTime, default=datetime.now),
+    UniqueConstraint("student_id", "course_id"),
 )
 
 class Student(Base):
@@ -22,13 +35,19 @@ class Student(Base):
     name = Column(String, index=True)
     email = Column(String, unique=True, index=True)
     phone = Column(String)
-    created_at = Column(DateTime, default=datetime.now)
+    credit_load = Column(Integer, default=0, server_default="0", nullable=False)  # 已選課程學分合計
+    created_at = Column(DateTime, default=datetime.now, index=True)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
     is_active = Column(Boolean, default=True)
 
     # 關係
     courses = relationship("Course", secondary=enrollment, back_populates="students")
 
+    __table_args__ = (
+        # 按啟用狀態過濾的統計查詢只讀取索引，不回表
+        Index("ix_students_active_credit_load", "is_active", "credit_load"),
+    )
+
 class Course(Base):
     __tablename__ = "courses"
 
@@ -36,11 +55,17 @@ class Course(Base):
     course_code = Column(String, unique=True, index=True)  # 課程代碼
     title = Column(String, index=True)
     description = Column(String)
-    credits = Column(Integer)
+    credits = Column(Integer, index=True)
     max_students = Column(Integer)
-    created_at = Column(DateTime, default=datetime.now)
+    enrolled_count = Column(Integer, default=0, server_default="0", nullable=False)  # 已選人數
+    created_at = Column(DateTime, default=datetime.now, index=True)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
     is_active = Column(Boolean, default=True)
 
     # 關係
-    students = relationship("Student", secondary=enrollment, back_populates="courses") 
\ No newline at end of file
+    students = relationship("Student", secondary=enrollment, back_populates="courses")
+
+    __table_args__ = (
+        # 按啟用狀態過濾的統計查詢只讀取索引，不回表
+        Index("ix_courses_active_seats", "is_active", "enrolled_count", "max_students"),
+    ) 
\ No newline at end of file
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+# 批量停用學生：按ID列表或過濾條件（前綴匹配）選取，兩者同時提供時取交集
+class StudentDeactivate(BaseModel):
+    ids: Optional[List[int]] = None
+    name: Optional[str] = None
+    student_id: Optional[str] = None
+
+# 批量停用課程：按ID列表或過濾條件選取，兩者同時提供時取交集
+class CourseDeactivate(BaseModel):
+    ids: Optional[List[int]] = None
+    course_code: Optional[str] = None
+    title: Optional[str] = None
+    credits_min: Optional[int] = None
+    credits_max: Optional[int] = None
+
+# 批量停用結果
+class DeactivationResult(BaseModel):
+    matched: int
+    deactivated: int
+    enrollments_removed: int
+    waitlist_removed: int
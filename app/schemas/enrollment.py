@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 # 選課操作模式
@@ -21,4 +21,24 @@ class Enrollment(BaseModel):
 
     model_config = {
         "from_attributes": True
-    } 
\ No newline at end of file
+    } 
+
+# 批量選課操作模式
+class EnrollmentBatchCreate(BaseModel):
+    items: List[EnrollmentCreate]
+
+# 批量取消選課操作模式
+class EnrollmentBatchDelete(BaseModel):
+    items: List[EnrollmentDelete]
+
+# 批量操作中單筆記錄的處理結果
+class EnrollmentBatchItem(BaseModel):
+    student_id: int
+    course_id: int
+    status: Literal["accepted", "duplicate", "full", "not_found", "cancelled", "not_enrolled"]
+
+# 批量操作響應模式
+class EnrollmentBatchResult(BaseModel):
+    processed: int
+    succeeded: int
+    results: List[EnrollmentBatchItem]
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import List
+
+# 單行導入錯誤
+class ImportRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+# 導入結果報告
+class ImportReport(BaseModel):
+    total: int
+    inserted: int
+    committed: bool
+    errors: List[ImportRowError]
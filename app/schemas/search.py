@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+from typing import List
+
+from app.schemas.course import Course
+from app.schemas.student import Student
+
+# 搜索結果模式
+class SearchResult(BaseModel):
+    students: List[Student] = []
+    courses: List[Course] = []
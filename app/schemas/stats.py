@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import Optional
+
+# 課程選課統計
+class CourseStats(BaseModel):
+    course_id: int
+    course_code: str
+    title: str
+    enrolled: int
+    capacity: int
+    fill_rate: Optional[float] = None  # 已選人數 / 容量，容量為空或 0 時為空
+    is_active: bool
+
+# 學生學分負擔統計
+class StudentStats(BaseModel):
+    id: int
+    student_id: str
+    name: str
+    credit_load: int
+    is_active: bool
+
+# 全局統計
+class StatsSummary(BaseModel):
+    active_students: int
+    active_courses: int
+    enrollments: int
+    capacity: int
+    fill_rate: Optional[float] = None
+    average_credit_load: Optional[float] = None
@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from typing import Literal, Optional
+from datetime import datetime
+
+# 加入候補名單操作模式
+class WaitlistCreate(BaseModel):
+    student_id: int
+    course_id: int
+
+# 退出候補名單操作模式
+class WaitlistDelete(BaseModel):
+    student_id: int
+    course_id: int
+
+# 候補記錄響應模式
+class WaitlistEntry(BaseModel):
+    student_id: int
+    course_id: int
+    position: int  # 在該課程候補名單中的位置，從 1 開始
+    created_at: datetime
+
+# 候補狀態響應模式，遞補成功後狀態變為 enrolled
+class WaitlistPosition(BaseModel):
+    student_id: int
+    course_id: int
+    status: Literal["waiting", "enrolled"]
+    position: Optional[int] = None
@@ -2,10 +2,13 @@ from fastapi.testclient import TestClient
 import pytest
 import uuid
 import random
+import json
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+from app.api import deps
+from app.core.cache import course_cache
 from app.db.database import Base, get_db
 from app.main import app
 from app.models import models  # 確保導入所有模型
@@ -29,6 +32,9 @@ def override_get_db():
 
 # 覆蓋應用程序依賴
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[deps.get_db] = override_get_db
+app.dependency_overrides[deps.get_read_db] = override_get_db
+app.dependency_overrides[deps.get_write_db] = override_get_db
 
 # 設置測試客戶端
 client = TestClient(app)
@@ -37,6 +43,7 @@ client = TestClient(app)
 def test_db():
     # 創建表 - 每次測試前都重新創建
     Base.metadata.create_all(bind=engine)
+    course_cache.clear()
     yield
     # 清理 - 每次測試後刪除所有表
     Base.metadata.drop_all(bind=engine)
@@ -145,4 +152,779 @@ def test_enrollment(test_db):
     student_courses = client.get(f"/api/v1/enrollments/students/{student_id}/courses")
     assert student_courses.status_code == 200
     assert len(student_courses.json()) == 1
-    assert student_courses.json()[0]["course_id"] == course_id 
\ No newline at end of file
+    assert student_courses.json()[0]["course_id"] == course_id 
+
+def _create_student(name="批量測試學生"):
+    unique_id = str(uuid.uuid4())[:8]
+    response = client.post("/api/v1/students/", json={
+        "student_id": f"S{unique_id}",
+        "name": name,
+        "email": f"batch{unique_id}@example.com",
+    })
+    assert response.status_code == 201
+    return response.json()["id"]
+
+def _create_course(max_students=30, title="批量測試課程"):
+    unique_id = str(uuid.uuid4())[:8]
+    response = client.post("/api/v1/courses/", json={
+        "course_code": f"C{unique_id}",
+        "title": title,
+        "credits": 3,
+        "max_students": max_students,
+    })
+    assert response.status_code == 201
+    return response.json()["id"]
+
+def test_batch_enrollment(test_db):
+    students = [_create_student() for _ in range(3)]
+    course_id = _create_course(max_students=2)
+
+    items = [{"student_id": s, "course_id": course_id} for s in students]
+    items.append({"student_id": students[0], "course_id": course_id})
+    items.append({"student_id": 9999, "course_id": course_id})
+    response = client.post("/api/v1/enrollments/batch", json={"items": items})
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["status"] for r in data["results"]] == ["accepted", "accepted", "full", "duplicate", "not_found"]
+    assert data["succeeded"] == 2
+
+    # 名額不足時一次佔滿剩餘名額，語句數與批量大小無關
+    from app.core.metrics import DB_STATEMENTS
+
+    def statements(count):
+        others = [_create_student() for _ in range(count)]
+        course = _create_course(max_students=count // 2)
+        before = DB_STATEMENTS._values.get((), 0)
+        result = client.post("/api/v1/enrollments/batch", json={"items": [
+            {"student_id": s, "course_id": course} for s in others
+        ]}).json()
+        assert result["succeeded"] == count // 2
+        return DB_STATEMENTS._values.get((), 0) - before
+
+    assert statements(4) == statements(20)
+
+    # 檢查之後被並發請求搶先寫入的記錄：回滾後重新檢查，判定為 duplicate 而不是返回 500
+    from unittest import mock
+    from app.api.endpoints import enrollments as enrollment_endpoints
+
+    late, open_course = _create_student(), _create_course()
+    assert client.post("/api/v1/enrollments/", json={"student_id": late, "course_id": open_course}).status_code == 201
+    missed = iter([set()])
+    real_existing = enrollment_endpoints._existing_pairs
+    with mock.patch.object(
+        enrollment_endpoints, "_existing_pairs", lambda db, pairs: next(missed, None) or real_existing(db, pairs)
+    ):
+        response = client.post("/api/v1/enrollments/batch", json={"items": [{"student_id": late, "course_id": open_course}]})
+    assert response.status_code == 200
+    assert [r["status"] for r in response.json()["results"]] == ["duplicate"]
+
+    roster = client.get(f"/api/v1/enrollments/courses/{course_id}/students")
+    assert len(roster.json()) == 2
+
+    response = client.request("DELETE", "/api/v1/enrollments/batch", json={"items": items[:3]})
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["status"] for r in data["results"]] == ["cancelled", "cancelled", "not_enrolled"]
+    assert client.get(f"/api/v1/enrollments/courses/{course_id}/students").json() == []
+
+def test_enrollment_listing_pagination(test_db):
+    students = [_create_student() for _ in range(3)]
+    course_id = _create_course()
+    items = [{"student_id": s, "course_id": course_id} for s in students]
+    client.post("/api/v1/enrollments/batch", json={"items": items})
+
+    roster = client.get(f"/api/v1/enrollments/courses/{course_id}/students", params={"skip": 1, "limit": 1})
+    assert roster.status_code == 200
+    assert [r["student_id"] for r in roster.json()] == [sorted(students)[1]]
+
+    inactive = client.get(f"/api/v1/enrollments/courses/{course_id}/students", params={"is_active": False})
+    assert inactive.json() == []
+
+    assert client.get("/api/v1/enrollments/courses/9999/students").status_code == 404
+    assert client.get("/api/v1/enrollments/students/9999/courses").status_code == 404
+
+def test_enrolled_count_tracks_seats(test_db):
+    from app.db.seats import reconcile_enrolled_counts
+
+    first, second = _create_student(), _create_student()
+    course_id = _create_course(max_students=1)
+
+    assert client.post("/api/v1/enrollments/", json={"student_id": first, "course_id": course_id}).status_code == 201
+    full = client.post("/api/v1/enrollments/", json={"student_id": second, "course_id": course_id})
+    assert full.status_code == 400
+    assert full.json()["detail"] == "課程人數已滿"
+
+    # 刪除學生後名額被釋放
+    assert client.delete(f"/api/v1/students/{first}").status_code == 200
+    assert client.post("/api/v1/enrollments/", json={"student_id": second, "course_id": course_id}).status_code == 201
+
+    db = TestingSessionLocal()
+    try:
+        db.execute(models.Course.__table__.update().values(enrolled_count=0))
+        db.commit()
+        assert reconcile_enrolled_counts(db) == 1
+        assert db.get(models.Course, course_id).enrolled_count == 1
+    finally:
+        db.close()
+
+def test_statistics(test_db):
+    from app.db.seats import reconcile_aggregates
+
+    first, second = _create_student(), _create_student()
+    small, large = _create_course(max_students=4), _create_course(max_students=10)
+
+    assert client.post("/api/v1/enrollments/", json={"student_id": first, "course_id": small}).status_code == 201
+    client.post("/api/v1/enrollments/batch", json={"items": [
+        {"student_id": first, "course_id": large},
+        {"student_id": second, "course_id": small},
+    ]})
+    assert client.get(f"/api/v1/stats/students/{first}").json()["credit_load"] == 6
+
+    # 學分變更與退課同步到學分負擔
+    client.put(f"/api/v1/courses/{large}", json={"credits": 5})
+    assert client.get(f"/api/v1/stats/students/{first}").json()["credit_load"] == 8
+    client.request("DELETE", "/api/v1/enrollments/", json={"student_id": first, "course_id": small})
+    assert client.get(f"/api/v1/stats/students/{first}").json()["credit_load"] == 5
+
+    course = client.get(f"/api/v1/stats/courses/{small}").json()
+    assert (course["enrolled"], course["capacity"], course["fill_rate"]) == (1, 4, 0.25)
+    summary = client.get("/api/v1/stats/summary").json()
+    assert summary["enrollments"] == 2
+    assert summary["capacity"] == 14
+    assert summary["average_credit_load"] == 4.0
+
+    db = TestingSessionLocal()
+    try:
+        db.execute(models.Student.__table__.update().values(credit_load=0))
+        db.commit()
+        assert reconcile_aggregates(db) == {"enrolled_count": 0, "credit_load": 2}
+    finally:
+        db.close()
+    assert client.get(f"/api/v1/stats/students/{second}").json()["credit_load"] == 3
+
+def test_waitlist_promotion(test_db):
+    from app.db.waitlist import promote_waitlist
+
+    first, second, third = (_create_student() for _ in range(3))
+    course_id = _create_course(max_students=1)
+    assert client.post("/api/v1/enrollments/", json={"student_id": first, "course_id": course_id}).status_code == 201
+
+    for position, student_id in enumerate((second, third), start=1):
+        joined = client.post("/api/v1/waitlist/", json={"student_id": student_id, "course_id": course_id})
+        assert joined.status_code == 201
+        assert joined.json()["position"] == position
+    duplicate = client.post("/api/v1/waitlist/", json={"student_id": second, "course_id": course_id})
+    assert duplicate.json()["detail"] == "學生已在候補名單中"
+
+    # 課程額滿時不遞補
+    db = TestingSessionLocal()
+    try:
+        assert promote_waitlist(db) == 0
+    finally:
+        db.close()
+
+    # 退課釋放名額後按先後順序遞補
+    client.request("DELETE", "/api/v1/enrollments/", json={"student_id": first, "course_id": course_id})
+    db = TestingSessionLocal()
+    try:
+        assert promote_waitlist(db) == 1
+    finally:
+        db.close()
+    assert client.get(f"/api/v1/waitlist/students/{second}/courses/{course_id}").json()["status"] == "enrolled"
+    assert client.get(f"/api/v1/waitlist/students/{third}/courses/{course_id}").json() == {
+        "student_id": third, "course_id": course_id, "status": "waiting", "position": 1,
+    }
+    assert client.get(f"/api/v1/stats/students/{second}").json()["credit_load"] == 3
+
+    # 擴容後遞補剩餘的候補學生
+    client.put(f"/api/v1/courses/{course_id}", json={"max_students": 2})
+    db = TestingSessionLocal()
+    try:
+        assert promote_waitlist(db) == 1
+    finally:
+        db.close()
+    assert client.get(f"/api/v1/waitlist/courses/{course_id}").json() == []
+    assert client.get(f"/api/v1/stats/courses/{course_id}").json()["enrolled"] == 2
+
+def test_cursor_pagination(test_db):
+    course_ids = [_create_course() for _ in range(5)]
+
+    seen = []
+    cursor = ""
+    while cursor is not None:
+        response = client.get("/api/v1/courses/", params={"limit": 2, "cursor": cursor})
+        assert response.status_code == 200
+        seen.extend(course["id"] for course in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+    assert seen == course_ids
+
+    assert client.get("/api/v1/students/", params={"cursor": "不是游標"}).status_code == 400
+
+    # 非正數的每頁數量由參數校驗拒絕；split_page 本身也不會因空頁出錯
+    from app.api.pagination import split_page
+
+    for path in ["/api/v1/students/", "/api/v1/courses/"]:
+        for params in [{"cursor": "", "limit": 0}, {"cursor": "", "limit": -1}, {"skip": -1}]:
+            assert client.get(path, params=params).status_code == 422
+    assert split_page([], 0, None, models.Course.id) == ([], None)
+
+    # 偽造的游標：值的類型與排序列不符時返回 400，而不是把任意 JSON 傳給驅動
+    from app.api.pagination import encode_cursor
+
+    forged = [
+        ("/api/v1/students/", {}, "W3t9XQ"),  # [{}]
+        ("/api/v1/courses/", {}, "W1tdXQ"),  # [[]]
+        ("/api/v1/courses/", {}, encode_cursor(["1"])),
+        ("/api/v1/courses/", {"sort": "created_at"}, encode_cursor(["yesterday", 1])),
+        ("/api/v1/students/", {"sort": "name"}, encode_cursor([1, 1])),
+    ]
+    for path, params, cursor in forged:
+        assert client.get(path, params={**params, "cursor": cursor}).status_code == 400
+
+def test_async_mode_endpoints(tmp_path):
+    from fastapi import FastAPI
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from app.api.async_routes import async_router
+    from app.api.endpoints import courses, enrollments, students
+
+    db_path = tmp_path / "async.db"
+    Base.metadata.create_all(bind=create_engine(f"sqlite:///{db_path}"))
+    AsyncTestingSessionLocal = async_sessionmaker(
+        create_async_engine(f"sqlite+aiosqlite:///{db_path}"), expire_on_commit=False
+    )
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+
+    async_app = FastAPI()
+    async_app.include_router(async_router(students.router), prefix="/students")
+    async_app.include_router(async_router(courses.router), prefix="/courses")
+    async_app.include_router(async_router(enrollments.router), prefix="/enrollments")
+    async_app.dependency_overrides[deps.get_async_db] = override_get_async_db
+
+    with TestClient(async_app) as async_client:
+        student = async_client.post("/students/", json={
+            "student_id": "S-async", "name": "異步學生", "email": "async@example.com"
+        })
+        assert student.status_code == 201
+        course = async_client.post("/courses/", json={
+            "course_code": "C-async", "title": "異步課程", "credits": 2, "max_students": 1
+        })
+        assert course.status_code == 201
+        pair = {"student_id": student.json()["id"], "course_id": course.json()["id"]}
+        assert async_client.post("/enrollments/", json=pair).status_code == 201
+        assert async_client.post("/enrollments/", json=pair).status_code == 400
+        roster = async_client.get(f"/enrollments/courses/{pair['course_id']}/students")
+        assert [r["student_id"] for r in roster.json()] == [pair["student_id"]]
+        assert async_client.get("/students/9999").status_code == 404
+
+def test_sqlite_storage_profile(tmp_path):
+    from app.core.config import SQLITE_STORAGE_PROFILES
+    from app.db.storage import configure_sqlite, effective_pragmas, run_maintenance
+
+    profile_engine = create_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+    configure_sqlite(profile_engine, SQLITE_STORAGE_PROFILES["production"])
+    pragmas = effective_pragmas(profile_engine, ["journal_mode", "synchronous", "busy_timeout", "foreign_keys"])
+    assert pragmas == {"journal_mode": "wal", "synchronous": 1, "busy_timeout": 5000, "foreign_keys": 1}
+    run_maintenance(profile_engine)
+
+def test_course_cache_invalidation(test_db):
+    course_id = _create_course(title="快取課程")
+    stats = course_cache.stats()
+
+    for _ in range(3):
+        assert client.get(f"/api/v1/courses/{course_id}").json()["title"] == "快取課程"
+    assert list(client.get(f"/api/v1/courses/{course_id}").json()) == [
+        "course_code", "title", "description", "credits", "max_students", "is_active", "id", "created_at", "updated_at"
+    ]
+    assert client.get("/api/v1/courses/").json()[0]["title"] == "快取課程"
+    assert course_cache.stats()["hits"] - stats["hits"] == 3
+
+    client.put(f"/api/v1/courses/{course_id}", json={"title": "更新後的課程"})
+    assert client.get(f"/api/v1/courses/{course_id}").json()["title"] == "更新後的課程"
+    assert client.get("/api/v1/courses/").json()[0]["title"] == "更新後的課程"
+    assert client.get("/api/v1/courses/9999").status_code == 404
+
+    # 生成響應期間發生的寫入使快取失效時，生成的舊響應不寫入快取
+    from app.api.endpoints.courses import _cached_json
+    from app.core.cache import invalidate_course
+
+    def produce():
+        invalidate_course(course_id)
+        return b"{}", {}
+
+    invalidate_course(course_id)
+    assert _cached_json(("course", course_id), produce).body == b"{}"
+    assert course_cache.get(("course", course_id)) is None
+
+def test_export_streaming(test_db):
+    import csv
+    import io
+
+    student_id = _create_student(name="導出學生")
+    course_id = _create_course()
+    client.post("/api/v1/enrollments/", json={"student_id": student_id, "course_id": course_id})
+
+    response = client.get("/api/v1/export/students")
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [(row["id"], row["name"]) for row in rows] == [(student_id, "導出學生")]
+
+    response = client.get("/api/v1/export/enrollments", params={"format": "csv"})
+    assert list(csv.reader(io.StringIO(response.text)))[1][:2] == [str(student_id), str(course_id)]
+
+    # httpx 會按 Content-Encoding 自動解壓
+    response = client.get("/api/v1/export/courses", params={"gzip": True})
+    assert response.headers["content-encoding"] == "gzip"
+    assert json.loads(response.content)["id"] == course_id
+
+def test_bulk_import(test_db):
+    existing_id = _create_student()
+    existing = client.get(f"/api/v1/students/{existing_id}").json()
+
+    csv_body = "\n".join([
+        "student_id,name,email,phone",
+        "I001,導入一,i001@example.com,",
+        "I002,導入二,not-an-email,",
+        f"I003,導入三,{existing['email']},",
+        "I001,導入四,i004@example.com,",
+        "I005,導入五,i005@example.com,0912345678",
+    ])
+    files = {"file": ("students.csv", csv_body.encode(), "text/csv")}
+
+    response = client.post("/api/v1/import/students", files=files, params={"mode": "atomic"})
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["total"], report["inserted"], report["committed"]) == (5, 0, False)
+    assert [item["row"] for item in report["errors"]] == [2, 3, 4]
+    assert report["errors"][1]["errors"] == ["該郵箱已存在"]
+    assert report["errors"][2]["errors"] == ["學號在文件中重複"]
+
+    report = client.post("/api/v1/import/students", files=files, params={"batch_size": 2}).json()
+    assert (report["inserted"], report["committed"]) == (2, True)
+    assert len(client.get("/api/v1/students/").json()) == 3
+
+    ndjson_body = '{"course_code": "IC01", "title": "導入課程", "credits": 2, "max_students": 10}\n'
+    files = {"file": ("courses.ndjson", ndjson_body.encode(), "application/x-ndjson")}
+    assert client.post("/api/v1/import/courses", files=files).json()["inserted"] == 1
+
+    # 無法解析或結構不符的行同樣按行報告，不影響其他行
+    ndjson_body = "\n".join([
+        '{"course_code": "IC02", "title": "導入課程二", "credits": 2, "max_students": 10}',
+        '{"course_code": ',
+        '["IC03"]',
+        '{"course_code": "IC04", "title": "導入課程四", "room": "A101"}',
+    ])
+    files = {"file": ("courses.ndjson", ndjson_body.encode(), "application/x-ndjson")}
+    report = client.post("/api/v1/import/courses", files=files).json()
+    assert (report["total"], report["inserted"]) == (4, 1)
+    assert [item["row"] for item in report["errors"]] == [2, 3, 4]
+    assert report["errors"][1]["errors"] == ["記錄必須是 JSON 對象"]
+    assert report["errors"][2]["errors"] == ["未知欄位：room"]
+
+    csv_body = "student_id,name,email\nI006,導入六,i006@example.com,多餘\n"
+    files = {"file": ("students.csv", csv_body.encode(), "text/csv")}
+    report = client.post("/api/v1/import/students", files=files).json()
+    assert report["errors"] == [{"row": 1, "errors": ["列數多於表頭"]}]
+
+def test_search(test_db):
+    wang = _create_student(name="王小明")
+    _create_student(name="李小華")
+    course_id = _create_course(title="數據庫系統導論")
+
+    def ids(response, key):
+        assert response.status_code == 200
+        return [item["id"] for item in response.json()[key]]
+
+    assert ids(client.get("/api/v1/search", params={"q": "王小明"}), "students") == [wang]
+    assert ids(client.get("/api/v1/search", params={"q": "王"}), "students") == [wang]
+    assert ids(client.get("/api/v1/search", params={"q": "庫系統", "type": "courses"}), "courses") == [course_id]
+
+    # 一到兩個字的查詢：前綴匹配排在前面，不足時以子串匹配補足
+    xiao = _create_student(name="小明")
+    assert ids(client.get("/api/v1/search", params={"q": "小明", "type": "students"}), "students") == [xiao, wang]
+    assert ids(client.get("/api/v1/search", params={"q": "系統", "type": "courses"}), "courses") == [course_id]
+    assert ids(client.get("/api/v1/search", params={"q": "庫", "type": "courses"}), "courses") == [course_id]
+    assert ids(client.get("/api/v1/search", params={"q": "小明", "type": "students", "limit": 1}), "students") == [xiao]
+
+    # 觸發器保持檢索表與源表同步
+    client.put(f"/api/v1/students/{wang}", json={"name": "王大明"})
+    assert ids(client.get("/api/v1/search", params={"q": "王小明"}), "students") == []
+    assert ids(client.get("/api/v1/search", params={"q": "王大明"}), "students") == [wang]
+
+    client.delete(f"/api/v1/students/{wang}")
+    assert ids(client.get("/api/v1/search", params={"q": "王大明"}), "students") == []
+    assert ids(client.get("/api/v1/search", params={"q": "王大明", "include_inactive": True}), "students") == [wang]
+
+def test_metrics_endpoint(test_db):
+    student_id = _create_student()
+    client.get(f"/api/v1/students/{student_id}")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/api/v1/students/{student_id}",status="200"}' in body
+    assert 'db_statements_per_request_count{method="GET",route="/api/v1/students/{student_id}"}' in body
+    assert "course_cache_hits_total" in body
+
+    # 兩個路徑參數取值相同時仍使用路由模板作為標籤
+    client.get("/api/v1/waitlist/students/5/courses/5")
+    body = client.get("/metrics").text
+    assert 'route="/api/v1/waitlist/students/{student_id}/courses/{course_id}"' in body
+
+def test_synthetic_data_generator(tmp_path):
+    from app.db.seed_data import generate
+
+    def snapshot(url):
+        bind = create_engine(url)
+        Base.metadata.create_all(bind=bind)
+        result = generate(bind, 300, 20, 3, seed=7, batch_size=100)
+        with bind.connect() as conn:
+            rows = conn.exec_driver_sql("SELECT student_id, course_id FROM enrollment ORDER BY 1, 2").fetchall()
+            courses = conn.exec_driver_sql(
+                "SELECT c.id, c.max_students, c.enrolled_count, COUNT(e.student_id) FROM courses c "
+                "LEFT JOIN enrollment e ON e.course_id = c.id GROUP BY c.id ORDER BY c.id"
+            ).fetchall()
+            hits = conn.exec_driver_sql("SELECT COUNT(*) FROM students_fts WHERE students_fts MATCH '\"S00000042\"'").scalar()
+        bind.dispose()
+        return result, rows, courses, hits
+
+    result, rows, courses, hits = snapshot(f"sqlite:///{tmp_path / 'a.db'}")
+    assert result["enrollments"] == len(rows)
+    assert abs(len(rows) / 300 - 3) < 0.3
+    # 不超出容量，且已選人數與選課記錄一致；熱門課程選課人數更多
+    assert all(count == enrolled <= capacity for _, capacity, enrolled, count in courses)
+    assert courses[0][2] > courses[-1][2]
+    # 檢索索引在生成結束後重建
+    assert hits == 1
+    # 相同種子生成相同數據
+    assert snapshot(f"sqlite:///{tmp_path / 'b.db'}")[1] == rows
+
+def test_single_flight_collapses_concurrent_reads():
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from app.core.singleflight import SINGLE_FLIGHT_COLLAPSED, SingleFlight
+
+    flight = SingleFlight(window=5.0)
+    started, release = threading.Event(), threading.Event()
+    executions = []
+
+    def produce():
+        executions.append(1)
+        started.set()
+        release.wait(5)
+        return b"[]"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        leader = pool.submit(flight.do, ("singleflight_test", 1), produce)
+        started.wait(5)
+        followers = [pool.submit(flight.do, ("singleflight_test", 1), produce) for _ in range(7)]
+        # 等待所有跟隨者加入進行中的查詢後再放行
+        while SINGLE_FLIGHT_COLLAPSED._values.get(("singleflight_test",), 0) < 7:
+            time.sleep(0.001)
+        release.set()
+        assert {f.result() for f in [leader, *followers]} == {b"[]"}
+    assert len(executions) == 1
+
+    # 完成後的請求重新執行；不同參數互不合併
+    assert flight.do(("singleflight_test", 1), lambda: b"new") == b"new"
+    with pytest.raises(ValueError):
+        flight.do(("singleflight_test", 2), lambda: (_ for _ in ()).throw(ValueError()))
+
+def test_fast_read_path_matches_orm_path(test_db):
+    from app.api import fast_read
+
+    for _ in range(3):
+        _create_student()
+        _create_course()
+
+    def fetch(path):
+        response = client.get(path)
+        assert response.status_code == 200
+        return response.content, response.headers.get("X-Next-Cursor")
+
+    paths = ["/api/v1/students/", "/api/v1/students/?cursor=&limit=2", "/api/v1/courses/?cursor=&limit=2"]
+    original = fast_read.enabled
+    try:
+        fast_read.enabled = True
+        fast = [fetch(path) for path in paths]
+        course_cache.clear()
+        fast_read.enabled = False
+        orm = [fetch(path) for path in paths]
+    finally:
+        fast_read.enabled = original
+    # 兩條路徑的響應體（含欄位順序）與游標完全一致
+    assert [(json.loads(body), list(json.loads(body)[0]), cursor) for body, cursor in fast] == \
+        [(json.loads(body), list(json.loads(body)[0]), cursor) for body, cursor in orm]
+
+def test_schema_fingerprint_skips_ddl(tmp_path, monkeypatch):
+    from app.db import init_db as init_module
+
+    bind = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+    monkeypatch.setattr(init_module, "engine", bind)
+    try:
+        assert init_module.init_db() is True
+        # 結構指紋一致時不再執行 DDL
+        assert init_module.init_db() is False
+        assert init_module.init_db(mode="always") is True
+        with bind.begin() as conn:
+            conn.exec_driver_sql("UPDATE schema_version SET fingerprint = 'outdated'")
+        assert init_module.init_db() is True
+    finally:
+        bind.dispose()
+
+def test_read_your_writes_routing(monkeypatch):
+    from fastapi import Depends, FastAPI
+    from app.db import database
+
+    class FakeSession:
+        def __init__(self, pool):
+            self.pool = pool
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(database, "read_replica", True)
+    monkeypatch.setattr(deps, "SessionLocal", lambda: FakeSession("primary"))
+    monkeypatch.setattr(deps, "ReadSessionLocal", lambda: FakeSession("replica"))
+
+    routing = FastAPI()
+
+    @routing.get("/read")
+    def read(db=Depends(deps.get_read_db)):
+        return db.pool
+
+    @routing.post("/write")
+    def write(db=Depends(deps.get_write_db)):
+        return db.pool
+
+    routing_client = TestClient(routing)
+    assert routing_client.get("/read").json() == "replica"
+    assert routing_client.post("/write").json() == "primary"
+    # 寫入後窗口期內的讀請求走主庫，過期後恢復讀副本
+    assert routing_client.get("/read").json() == "primary"
+    routing_client.cookies.set(deps.READ_YOUR_WRITES_COOKIE, "0")
+    assert routing_client.get("/read").json() == "replica"
+
+def test_multi_worker_coordination(tmp_path, monkeypatch):
+    import sqlite3
+    from sqlalchemy.exc import OperationalError
+    from app.core import process_lock
+    from app.db import storage
+
+    # 後台任務鎖同一時刻只能由一個持有者取得，釋放後可被接替
+    monkeypatch.setattr(process_lock, "LOCK_DIR", tmp_path)
+    leader = process_lock.try_hold("background")
+    assert leader is not None
+    assert process_lock.try_hold("background") is None
+    leader.close()
+    follower = process_lock.try_hold("background")
+    assert follower is not None
+    follower.close()
+
+    # SQLITE_BUSY 時回滾會話並重試，其他錯誤直接拋出
+    monkeypatch.setattr(storage, "SQLITE_BUSY_BACKOFF", 0)
+    session = TestingSessionLocal()
+    attempts = []
+
+    @storage.retry_on_busy
+    def write(db):
+        attempts.append(db)
+        if len(attempts) < 3:
+            raise OperationalError("INSERT", {}, sqlite3.OperationalError("database is locked"))
+        return "ok"
+
+    assert write(db=session) == "ok"
+    assert len(attempts) == 3
+
+    @storage.retry_on_busy
+    def broken(db):
+        attempts.append(db)
+        raise OperationalError("INSERT", {}, sqlite3.OperationalError("no such table: x"))
+
+    attempts.clear()
+    with pytest.raises(OperationalError):
+        broken(db=session)
+    assert len(attempts) == 1
+    session.close()
+
+    # 異步模式下以 asyncio.sleep 退避，不阻塞事件循環
+    import asyncio
+
+    monkeypatch.setattr(storage.time, "sleep", lambda seconds: pytest.fail("blocking sleep on the event loop"))
+    monkeypatch.setattr(storage, "SQLITE_BUSY_BACKOFF", 0.001)
+    attempts.clear()
+    calls = iter([OperationalError("INSERT", {}, sqlite3.OperationalError("database is locked")), None])
+
+    async def call():
+        attempts.append(None)
+        error = next(calls)
+        if error is not None:
+            raise error
+        return "ok"
+
+    async def rollback():
+        attempts.append("rollback")
+
+    assert asyncio.run(storage.retry_on_busy_async("write", call, rollback)) == "ok"
+    assert attempts == [None, "rollback", None]
+    assert write.busy_retry_endpoint.__name__ == "write"
+
+def test_single_statement_updates(test_db):
+    from app.core.metrics import DB_STATEMENTS
+
+    def statements(call):
+        before = DB_STATEMENTS._values.get((), 0)
+        response = call()
+        return response, DB_STATEMENTS._values.get((), 0) - before
+
+    first, second = _create_student(), _create_student()
+    taken = client.get(f"/api/v1/students/{second}").json()
+    original = client.get(f"/api/v1/students/{first}").json()
+
+    response, count = statements(lambda: client.put(f"/api/v1/students/{first}", json={"name": "新名字"}))
+    assert response.status_code == 200 and count == 1
+    assert response.json()["name"] == "新名字"
+    assert response.json()["updated_at"] > original["updated_at"]
+
+    # 唯一索引衝突映射為原有的錯誤信息
+    response = client.put(f"/api/v1/students/{first}", json={"email": taken["email"]})
+    assert response.status_code == 400 and response.json()["detail"] == "該郵箱已被其他學生使用"
+    response = client.put(f"/api/v1/students/{first}", json={"student_id": taken["student_id"]})
+    assert response.status_code == 400 and response.json()["detail"] == "該學號已被其他學生使用"
+    assert client.put("/api/v1/students/999999", json={"name": "x"}).status_code == 404
+
+    course, other = _create_course(), _create_course()
+    other_code = client.get(f"/api/v1/courses/{other}").json()["course_code"]
+    response = client.put(f"/api/v1/courses/{course}", json={"course_code": other_code})
+    assert response.status_code == 400 and response.json()["detail"] == "該課程代碼已被其他課程使用"
+
+    # 軟刪除之後依次清理學分負擔、選課記錄、已選人數與候補記錄
+    response, count = statements(lambda: client.delete(f"/api/v1/courses/{course}"))
+    assert response.status_code == 200 and count == 5
+    assert response.json()["is_active"] is False
+    assert client.delete("/api/v1/courses/999999").status_code == 404
+    assert client.delete(f"/api/v1/students/{first}").json()["is_active"] is False
+
+def test_hot_path_query_plans(test_db):
+    from benchmarks.query_plans import check_hot_paths, explain, full_scans
+    from app.db.seed_data import generate
+
+    generate(engine, 500, 20, 3, seed=3)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    # 熱點路徑上的每條語句都應經由索引查找
+    assert [report for report in check_hot_paths(client, engine) if report.full_scans] == []
+
+    # 不經索引按課程查詢名單時會被判定為全表掃描
+    with engine.connect() as conn:
+        plan = explain(conn, "SELECT student_id FROM enrollment NOT INDEXED WHERE course_id = ?", (1,))
+    assert full_scans(plan) == ["SCAN enrollment"]
+
+def test_list_filters_and_sorting(test_db):
+    from app.api import fast_read
+
+    codes = ["MA101", "CS201", "CS101", "CS301"]
+    for index, code in enumerate(codes):
+        response = client.post("/api/v1/courses/", json={
+            "course_code": code, "title": f"課程{code}", "credits": index + 1, "max_students": 10,
+            "is_active": code != "CS301",
+        })
+        assert response.status_code == 201
+    for name in ["王小明", "王大明", "李小華"]:
+        _create_student(name)
+
+    original = fast_read.enabled
+    try:
+        for fast in (True, False):
+            fast_read.enabled = fast
+            course_cache.clear()
+            courses = client.get("/api/v1/courses/?course_code=CS&sort=-course_code").json()
+            assert [course["course_code"] for course in courses] == ["CS301", "CS201", "CS101"]
+            courses = client.get("/api/v1/courses/?credits_min=2&credits_max=3&is_active=true").json()
+            assert [course["course_code"] for course in courses] == ["CS201", "CS101"]
+            students = client.get("/api/v1/students/?name=王&sort=-name").json()
+            assert [student["name"] for student in students] == ["王小明", "王大明"]
+
+            # 降序游標分頁逐頁讀完
+            pages, cursor = [], ""
+            while cursor is not None:
+                response = client.get(f"/api/v1/courses/?sort=-credits&limit=1&cursor={cursor}")
+                pages += [course["credits"] for course in response.json()]
+                cursor = response.headers.get("X-Next-Cursor")
+            assert pages == [4, 3, 2, 1]
+    finally:
+        fast_read.enabled = original
+
+    response = client.get("/api/v1/courses/?sort=description")
+    assert response.status_code == 400
+
+    # 無法遞增的邊界字符不會導致 500
+    for prefix in ["\U0010ffff", "a\U0010ffff", "\ud7ff"]:
+        assert client.get("/api/v1/students/", params={"name": prefix}).json() == []
+        assert client.get("/api/v1/courses/", params={"title": prefix}).status_code == 200
+
+def test_bulk_deactivation(test_db):
+    from app.db.seats import reconcile_aggregates
+
+    students = [_create_student(name="停用測試") for _ in range(4)]
+    kept = _create_student(name="保留學生")
+    full, other = _create_course(max_students=2, title="停用課程"), _create_course(title="保留課程")
+    for student_id in students[:2]:
+        assert client.post("/api/v1/enrollments/", json={"student_id": student_id, "course_id": full}).status_code == 201
+    for student_id in students + [kept]:
+        assert client.post("/api/v1/enrollments/", json={"student_id": student_id, "course_id": other}).status_code == 201
+    assert client.post("/api/v1/waitlist/", json={"student_id": students[2], "course_id": full}).status_code == 201
+
+    # 按ID停用：重複ID與已停用的學生不重複計數
+    response = client.post("/api/v1/students/deactivate", json={"ids": [students[0], students[0], students[2]]})
+    assert response.status_code == 200
+    assert response.json() == {"matched": 2, "deactivated": 2, "enrollments_removed": 3, "waitlist_removed": 1}
+    assert client.get(f"/api/v1/stats/courses/{full}").json()["enrolled"] == 1
+
+    # 按過濾條件停用課程，選課學生的學分負擔同步扣減
+    response = client.post("/api/v1/courses/deactivate", json={"title": "停用"})
+    assert response.json() == {"matched": 1, "deactivated": 1, "enrollments_removed": 1, "waitlist_removed": 0}
+    course = client.get(f"/api/v1/stats/courses/{full}").json()
+    assert course["is_active"] is False and course["enrolled"] == 0
+    assert client.get(f"/api/v1/stats/students/{students[1]}").json()["credit_load"] == 3
+
+    response = client.post("/api/v1/students/deactivate", json={"ids": students + [kept], "name": "停用"})
+    assert response.json()["matched"] == 4 and response.json()["deactivated"] == 2
+    assert client.get(f"/api/v1/students/{kept}").json()["is_active"] is True
+    assert client.post("/api/v1/students/deactivate", json={}).status_code == 400
+
+    # 刪除單門課程同樣釋放名額
+    client.delete(f"/api/v1/courses/{other}")
+    assert client.get(f"/api/v1/enrollments/students/{kept}/courses").json() == []
+    with TestingSessionLocal() as db:
+        assert reconcile_aggregates(db) == {"enrolled_count": 0, "credit_load": 0}
+
+def test_sparse_fieldsets(test_db):
+    from benchmarks.query_plans import capture_statements
+
+    courses = [_create_course(title=f"欄位課程{i}") for i in range(3)]
+    student = _create_student()
+
+    with capture_statements() as statements:
+        response = client.get("/api/v1/courses/?fields=title,id,course_code&sort=-title&limit=2&cursor=")
+    assert [list(course) for course in response.json()] == [["course_code", "title", "id"]] * 2
+    assert [course["id"] for course in response.json()] == courses[:0:-1]
+    # 查詢只選取請求的列
+    assert "description" not in statements[-1][0] and "created_at" not in statements[-1][0]
+
+    # 只請求 title 時，游標分頁所需的 id 仍會查詢但不會輸出
+    first = client.get("/api/v1/courses/?fields=title&sort=-title&limit=2&cursor=")
+    rest = client.get(f"/api/v1/courses/?fields=title&sort=-title&limit=2&cursor={first.headers['X-Next-Cursor']}")
+    assert first.json() + rest.json() == [{"title": f"欄位課程{i}"} for i in (2, 1, 0)]
+
+    assert client.get(f"/api/v1/courses/{courses[0]}?fields=credits").json() == {"credits": 3}
+    assert client.get("/api/v1/courses/999999?fields=credits").status_code == 404
+    assert set(client.get(f"/api/v1/students/{student}?fields=name,email").json()) == {"name", "email"}
+    assert set(client.get("/api/v1/students/?fields=student_id").json()[0]) == {"student_id"}
+
+    response = client.get("/api/v1/students/?fields=name,password")
+    assert response.status_code == 400 and "password" in response.json()["detail"]
+    assert client.get("/api/v1/courses/?fields=").status_code == 400
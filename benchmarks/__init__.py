@@ -0,0 +1 @@
+# 性能基準測試
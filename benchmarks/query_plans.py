@@ -0,0 +1,194 @@
+"""
+熱點路徑查詢計劃檢查
+
+    python -m benchmarks.query_plans --students 100000 --courses 2000
+
+生成模擬數據並執行 ANALYZE 後，依次請求各熱點端點，記錄每個請求執行的 SQL，
+用 EXPLAIN QUERY PLAN 檢查查詢計劃。出現全表掃描（不經索引，或遍歷整個索引）時
+列出對應的端點與語句並以非零狀態碼退出；未帶過濾條件的分頁列表允許順序掃描。
+"""
+import argparse
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+@dataclass
+class HotPath:
+    method: str
+    path: str
+    json: Optional[Any] = None
+    # 未帶過濾條件的分頁列表按主鍵順序掃描並在 LIMIT 處停止，不視為問題
+    allow_scan: bool = False
+
+# 路徑與請求體中的 {student}、{course} 等佔位符由 hot_path_ids() 查得的 ID 填充
+HOT_PATHS = [
+    HotPath("GET", "/api/v1/students/{student}"),
+    HotPath("GET", "/api/v1/students/?limit=50", allow_scan=True),
+    HotPath("GET", "/api/v1/students/?cursor=&limit=50", allow_scan=True),
+    HotPath("GET", "/api/v1/students/?sort=-created_at&limit=50", allow_scan=True),
+    HotPath("GET", "/api/v1/students/?name=王&sort=name&cursor=&limit=50"),
+    HotPath("GET", "/api/v1/students/?student_id=S0000&limit=50"),
+    HotPath("PUT", "/api/v1/students/{student}", {"name": "查詢計劃"}),
+    HotPath("GET", "/api/v1/courses/{course}"),
+    HotPath("GET", "/api/v1/courses/?limit=50", allow_scan=True),
+    HotPath("GET", "/api/v1/courses/?sort=title&cursor=&limit=50", allow_scan=True),
+    HotPath("GET", "/api/v1/courses/?course_code=CS&sort=course_code&limit=50"),
+    HotPath("GET", "/api/v1/courses/?title=電機&limit=50"),
+    HotPath("GET", "/api/v1/courses/?fields=id,course_code,title,credits&sort=title&cursor=&limit=50", allow_scan=True),
+    HotPath("PUT", "/api/v1/courses/{course}", {"credits": 4}),
+    HotPath("GET", "/api/v1/enrollments/courses/{course}/students?limit=50"),
+    HotPath("GET", "/api/v1/enrollments/courses/{course}/students?is_active=true"),
+    HotPath("GET", "/api/v1/enrollments/students/{student}/courses"),
+    HotPath("POST", "/api/v1/enrollments/", {"student_id": "{newcomer}", "course_id": "{course}"}),
+    HotPath("DELETE", "/api/v1/enrollments/", {"student_id": "{newcomer}", "course_id": "{course}"}),
+    HotPath("POST", "/api/v1/enrollments/batch", {"items": [{"student_id": "{newcomer}", "course_id": "{course}"}]}),
+    HotPath("DELETE", "/api/v1/enrollments/batch", {"items": [{"student_id": "{newcomer}", "course_id": "{course}"}]}),
+    HotPath("POST", "/api/v1/waitlist/", {"student_id": "{newcomer}", "course_id": "{course}"}),
+    HotPath("GET", "/api/v1/waitlist/students/{newcomer}/courses/{course}"),
+    HotPath("GET", "/api/v1/waitlist/courses/{course}"),
+    HotPath("DELETE", "/api/v1/waitlist/", {"student_id": "{newcomer}", "course_id": "{course}"}),
+    HotPath("GET", "/api/v1/stats/summary"),
+    HotPath("GET", "/api/v1/stats/courses/{course}"),
+    HotPath("GET", "/api/v1/stats/students/{student}"),
+    HotPath("GET", "/api/v1/stats/courses?limit=50", allow_scan=True),
+    HotPath("GET", "/api/v1/search?q=Intro"),
+    HotPath("POST", "/api/v1/students/deactivate", {"ids": ["{newcomer}"]}),
+    HotPath("DELETE", "/api/v1/students/{student}"),
+    HotPath("POST", "/api/v1/courses/deactivate", {"ids": ["{course}"], "credits_min": 1}),
+    HotPath("DELETE", "/api/v1/courses/{course}"),
+]
+
+# 全表掃描：SCAN 表名，或 SCAN 表名 USING [COVERING] INDEX 索引名（遍歷整個索引）；
+# 虛擬表（全文檢索）與常量行不在此列
+FULL_SCAN = re.compile(r"^SCAN \w+(?: USING (?:COVERING )?INDEX \w+)?$")
+
+@dataclass
+class PlanReport:
+    request: str
+    statement: str
+    plan: List[str]
+    full_scans: List[str] = field(default_factory=list)
+
+@contextmanager
+def capture_statements() -> Iterator[List[Tuple[str, Any]]]:
+    """
+    記錄代碼塊中執行的 SQL 語句及參數（讀寫兩個引擎都記錄，executemany 只保留第一組參數）
+    """
+    statements: List[Tuple[str, Any]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        statements.append((statement, parameters))
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+def explain(conn, statement: str, parameters: Any) -> List[str]:
+    return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+def full_scans(plan: List[str]) -> List[str]:
+    return [step for step in plan if FULL_SCAN.match(step)]
+
+def hot_path_ids(conn) -> Dict[str, int]:
+    """
+    選取選課人數最多的課程、其中一名學生，以及一名未選該課程的學生
+    """
+    course = conn.exec_driver_sql(
+        "SELECT course_id FROM enrollment GROUP BY course_id ORDER BY count(*) DESC LIMIT 1"
+    ).scalar()
+    student = conn.exec_driver_sql(
+        "SELECT student_id FROM enrollment WHERE course_id = ? LIMIT 1", (course,)
+    ).scalar()
+    newcomer = conn.exec_driver_sql(
+        "SELECT id FROM students WHERE is_active = 1 AND id NOT IN "
+        "(SELECT student_id FROM enrollment WHERE course_id = ?) AND id != ? LIMIT 1",
+        (course, student),
+    ).scalar()
+    return {"course": course, "student": student, "newcomer": newcomer}
+
+def _fill(value: Any, ids: Dict[str, int]) -> Any:
+    if isinstance(value, dict):
+        return {key: _fill(item, ids) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_fill(item, ids) for item in value]
+    if isinstance(value, str) and re.fullmatch(r"\{\w+\}", value):
+        return ids[value[1:-1]]
+    return value
+
+def check_hot_paths(client, engine: Engine, hot_paths: List[HotPath] = HOT_PATHS) -> List[PlanReport]:
+    """
+    依次請求熱點端點並檢查每條語句的查詢計劃，返回所有語句的報告
+    """
+    from app.core.cache import course_cache
+
+    with engine.connect() as conn:
+        ids = hot_path_ids(conn)
+    reports: List[PlanReport] = []
+    cache_enabled = course_cache.enabled
+    # 快取命中時不會執行 SQL
+    course_cache.enabled = False
+    try:
+        for hot_path in hot_paths:
+            path = hot_path.path.format(**ids)
+            with capture_statements() as statements:
+                response = client.request(hot_path.method, path, json=_fill(hot_path.json, ids))
+            assert response.status_code < 500, f"{hot_path.method} {path}: {response.status_code}"
+            with engine.connect() as conn:
+                for statement, parameters in statements:
+                    plan = explain(conn, statement, parameters)
+                    scans = [] if hot_path.allow_scan else full_scans(plan)
+                    reports.append(PlanReport(f"{hot_path.method} {path}", statement, plan, scans))
+    finally:
+        course_cache.enabled = cache_enabled
+    return reports
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="熱點路徑查詢計劃檢查")
+    parser.add_argument("--students", type=int, default=100_000)
+    parser.add_argument("--courses", type=int, default=2_000)
+    parser.add_argument("--avg-enrollments", type=float, default=5)
+    parser.add_argument("--verbose", action="store_true", help="輸出所有語句的查詢計劃")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.TemporaryDirectory()
+    # 必須在導入應用模塊之前設置
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(workdir.name) / 'query_plans.db'}"
+
+    from fastapi.testclient import TestClient
+
+    from app.db.database import engine
+    from app.db.init_db import init_db
+    from app.db.seed_data import generate
+    from app.main import app
+
+    init_db()
+    generate(engine, args.students, args.courses, args.avg_enrollments)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+    reports = check_hot_paths(TestClient(app), engine)
+    failures = [report for report in reports if report.full_scans]
+    for report in reports:
+        if report.full_scans or args.verbose:
+            print(f"{report.request}\n  {' '.join(report.statement.split())}")
+            for step in report.plan:
+                print(f"    {'!! ' if step in report.full_scans else ''}{step}")
+    print(f"檢查了 {len(reports)} 條語句，{len(failures)} 條存在全表掃描")
+
+    engine.dispose()
+    workdir.cleanup()
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,90 @@
+"""
+列表端點讀取路徑對比
+
+    python -m benchmarks.read_path --rows 1000 --repeat 50
+
+分別以 ORM + Pydantic 路徑與 Core + orjson 快速路徑請求學生、課程列表，
+統計每 1000 行的 CPU 時間與峰值內存分配（tracemalloc）。
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ENDPOINTS = {
+    "students": "/api/v1/students/?skip=0&limit={rows}",
+    "courses": "/api/v1/courses/?skip=0&limit={rows}",
+}
+
+def measure(client, path: str, repeat: int, rows: int) -> Dict[str, Any]:
+    for _ in range(3):
+        assert client.get(path).status_code == 200
+    # CPU 時間與內存分配分開統計，避免 tracemalloc 本身的開銷計入 CPU 時間
+    cpu, peaks = [], []
+    for _ in range(repeat):
+        start = time.process_time()
+        response = client.get(path)
+        cpu.append(time.process_time() - start)
+        assert response.status_code == 200
+    for _ in range(repeat):
+        tracemalloc.start()
+        client.get(path)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    scale = 1000 / rows
+    return {
+        "cpu_ms_per_1000_rows": round(statistics.median(cpu) * 1000 * scale, 3),
+        "peak_kib_per_1000_rows": round(statistics.median(peaks) / 1024 * scale, 1),
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="列表端點讀取路徑對比")
+    parser.add_argument("--rows", type=int, default=1000, help="每次請求返回的行數")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--output", type=Path, help="結果 JSON 文件")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.TemporaryDirectory()
+    # 必須在導入應用模塊之前設置
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(workdir.name) / 'read_path.db'}"
+
+    from fastapi.testclient import TestClient
+
+    from app.api import fast_read
+    from app.core.cache import course_cache
+    from app.db.database import engine
+    from app.db.init_db import init_db
+    from app.db.seed_data import generate
+    from app.main import app
+
+    init_db()
+    generate(engine, args.rows, args.rows, 0)
+    # 關閉課程快取，保證每次請求都走完整的讀取路徑
+    course_cache.enabled = False
+    client = TestClient(app)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, template in ENDPOINTS.items():
+        path = template.format(rows=args.rows)
+        for label, fast in (("orm", False), ("fast", True)):
+            fast_read.enabled = fast
+            results.setdefault(name, {})[label] = measure(client, path, args.repeat, args.rows)
+        orm, fast = results[name]["orm"], results[name]["fast"]
+        print(
+            f"{name}: CPU {orm['cpu_ms_per_1000_rows']} -> {fast['cpu_ms_per_1000_rows']} ms/1000 行，"
+            f"峰值分配 {orm['peak_kib_per_1000_rows']} -> {fast['peak_kib_per_1000_rows']} KiB/1000 行"
+        )
+
+    engine.dispose()
+    workdir.cleanup()
+    if args.output:
+        args.output.write_text(json.dumps(results, ensure_ascii=False, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
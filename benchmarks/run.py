@@ -0,0 +1,281 @@
+"""
+端點性能基準測試
+
+    python -m benchmarks.run --scale small --mode inprocess --duration 10 --output bench.json
+    python -m benchmarks.run --scale medium --mode uvicorn --baseline bench_baseline.json --threshold 0.15
+
+按指定規模準備數據庫，以多個並發客戶端按真實比例混合請求各個端點（課程瀏覽、選課高峰、
+名單讀取、統計與候補等），統計吞吐量與 p50/p95/p99 延遲並寫入 JSON；給定基準文件時，吞吐量下降或
+p95 延遲上升超過閾值即視為性能回退，以非零狀態碼退出。
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# 預設規模：(學生數, 課程數, 每個學生平均選課數)
+# 此模塊在設置 DATABASE_URL 之前不能導入任何 app 模塊
+SCALES = {
+    "small": (1_000, 100, 4),
+    "medium": (100_000, 2_000, 4),
+    "large": (1_000_000, 5_000, 4),
+}
+
+# (權重, 端點名稱, 請求生成函數, 預期狀態碼)
+RequestSpec = Tuple[int, str, Callable[[random.Random, "Dataset"], Tuple[str, str, Optional[dict]]], Tuple[int, ...]]
+
+class Dataset:
+    def __init__(self, students: int, courses: int):
+        self.students = students
+        self.courses = courses
+
+    def student(self, rng: random.Random) -> int:
+        return rng.randint(1, self.students)
+
+    def course(self, rng: random.Random) -> int:
+        # 與生成數據的熱度分佈一致：課程 ID 越小越熱門，請求集中在前 10%
+        if rng.random() < 0.8:
+            return rng.randint(1, max(1, self.courses // 10))
+        return rng.randint(1, self.courses)
+
+    def waitlist_pair(self, rng: random.Random) -> Tuple[int, int]:
+        # 候補請求集中在少量學生和熱門課程上，使位置查詢與退出能命中先前加入的記錄
+        return rng.randint(1, max(1, self.students // 20)), rng.randint(1, max(1, self.courses // 10))
+
+SCENARIOS: Dict[str, List[RequestSpec]] = {
+    "catalog_browsing": [
+        (5, "GET /courses/", lambda rng, ds: ("GET", f"/api/v1/courses/?skip={rng.randint(0, max(0, ds.courses - 20))}&limit=20", None), (200,)),
+        (10, "GET /courses/{id}", lambda rng, ds: ("GET", f"/api/v1/courses/{ds.course(rng)}", None), (200,)),
+        (2, "GET /search", lambda rng, ds: ("GET", f"/api/v1/search?q={rng.randint(1, ds.courses):05d}&type=courses", None), (200,)),
+    ],
+    "enrollment_rush": [
+        (6, "POST /enrollments/", lambda rng, ds: ("POST", "/api/v1/enrollments/", {"student_id": ds.student(rng), "course_id": ds.course(rng)}), (201, 400)),
+        (2, "DELETE /enrollments/", lambda rng, ds: ("DELETE", "/api/v1/enrollments/", {"student_id": ds.student(rng), "course_id": ds.course(rng)}), (200, 400)),
+        (2, "GET /courses/{id}", lambda rng, ds: ("GET", f"/api/v1/courses/{ds.course(rng)}", None), (200,)),
+    ],
+    "roster_reads": [
+        (5, "GET /enrollments/courses/{id}/students", lambda rng, ds: ("GET", f"/api/v1/enrollments/courses/{ds.course(rng)}/students", None), (200,)),
+        (5, "GET /enrollments/students/{id}/courses", lambda rng, ds: ("GET", f"/api/v1/enrollments/students/{ds.student(rng)}/courses", None), (200,)),
+    ],
+    "student_admin": [
+        (4, "GET /students/", lambda rng, ds: ("GET", f"/api/v1/students/?skip={rng.randint(0, max(0, ds.students - 50))}&limit=50", None), (200,)),
+        (4, "GET /students/{id}", lambda rng, ds: ("GET", f"/api/v1/students/{ds.student(rng)}", None), (200,)),
+        (1, "PUT /students/{id}", lambda rng, ds: ("PUT", f"/api/v1/students/{ds.student(rng)}", {"phone": f"09{rng.randint(0, 99999999):08d}"}), (200,)),
+    ],
+    "stats_waitlist": [
+        (2, "GET /stats/summary", lambda rng, ds: ("GET", "/api/v1/stats/summary", None), (200,)),
+        (3, "GET /stats/courses/{id}", lambda rng, ds: ("GET", f"/api/v1/stats/courses/{ds.course(rng)}", None), (200,)),
+        (2, "GET /stats/students/{id}", lambda rng, ds: ("GET", f"/api/v1/stats/students/{ds.student(rng)}", None), (200,)),
+        (3, "POST /waitlist/", lambda rng, ds: ("POST", "/api/v1/waitlist/", dict(zip(("student_id", "course_id"), ds.waitlist_pair(rng)))), (201, 400)),
+        (4, "GET /waitlist/students/{id}/courses/{id}", lambda rng, ds: ("GET", "/api/v1/waitlist/students/{}/courses/{}".format(*ds.waitlist_pair(rng)), None), (200, 404)),
+        (1, "DELETE /waitlist/", lambda rng, ds: ("DELETE", "/api/v1/waitlist/", dict(zip(("student_id", "course_id"), ds.waitlist_pair(rng)))), (200, 400)),
+        (1, "GET /export/courses", lambda rng, ds: ("GET", "/api/v1/export/courses", None), (200,)),
+    ],
+}
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(values, 0.50) * 1000, 3),
+            "p95": round(percentile(values, 0.95) * 1000, 3),
+            "p99": round(percentile(values, 0.99) * 1000, 3),
+        },
+    }
+
+async def run_scenario(client: httpx.AsyncClient, specs: List[RequestSpec], dataset: Dataset,
+                       duration: float, concurrency: int, seed: int) -> Dict[str, Any]:
+    weights = [spec[0] for spec in specs]
+    latencies: Dict[str, List[float]] = {spec[1]: [] for spec in specs}
+    errors: Dict[str, int] = {spec[1]: 0 for spec in specs}
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id: int) -> None:
+        rng = random.Random(seed * 1000 + worker_id)
+        while time.perf_counter() < deadline:
+            _, name, build, expected = rng.choices(specs, weights)[0]
+            method, url, body = build(rng, dataset)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+                ok = response.status_code in expected
+            except httpx.HTTPError:
+                ok = False
+            latencies[name].append(time.perf_counter() - start)
+            if not ok:
+                errors[name] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    result = summarize([value for values in latencies.values() for value in values], sum(errors.values()), elapsed)
+    result["endpoints"] = {name: summarize(latencies[name], errors[name], elapsed) for name in latencies}
+    return result
+
+def prepare_database(db_path: Path, students: int, courses: int, per_student: int, reseed: bool, seed: int) -> None:
+    from app.db.database import engine
+    from app.db.init_db import init_db
+    from app.db.seed_data import generate
+
+    if reseed and db_path.exists():
+        db_path.unlink()
+    if db_path.exists():
+        return
+    init_db()
+    start = time.perf_counter()
+    generate(engine, students, courses, per_student, seed)
+    print(f"已生成基準數據 {db_path}（{time.perf_counter() - start:.1f}s）")
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def _wait_until_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while True:
+            try:
+                if (await client.get("/")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.perf_counter() > deadline:
+                raise RuntimeError("uvicorn 未能在限定時間內啟動")
+            await asyncio.sleep(0.2)
+
+async def run_all(args: argparse.Namespace, dataset: Dataset) -> Dict[str, Any]:
+    server = None
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.mode == "uvicorn":
+        port = _free_port()
+        command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+                   "--port", str(port), "--log-level", "warning", "--no-access-log"]
+        if args.workers > 1:
+            command += ["--workers", str(args.workers)]
+        server = subprocess.Popen(command, cwd=BASE_DIR, env=os.environ.copy())
+        base_url = f"http://127.0.0.1:{port}"
+        await _wait_until_ready(base_url)
+        client = httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0)
+    else:
+        from app.main import app
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=30.0)
+
+    results = {}
+    try:
+        for name in args.scenarios:
+            print(f"運行場景 {name}（{args.duration}s，{args.concurrency} 並發）...")
+            results[name] = await run_scenario(
+                client, SCENARIOS[name], dataset, args.duration, args.concurrency, args.seed
+            )
+            summary = results[name]
+            print(f"  {summary['throughput_rps']} req/s，p50 {summary['latency_ms']['p50']}ms，"
+                  f"p95 {summary['latency_ms']['p95']}ms，p99 {summary['latency_ms']['p99']}ms，錯誤 {summary['errors']}")
+    finally:
+        await client.aclose()
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+    return results
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    與基準結果比較，返回超出閾值的回退項
+    """
+    regressions = []
+    for name, result in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        if base["throughput_rps"] and result["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+            regressions.append(f"{name}: 吞吐量 {base['throughput_rps']} -> {result['throughput_rps']} req/s")
+        if base["latency_ms"]["p95"] and result["latency_ms"]["p95"] > base["latency_ms"]["p95"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {base['latency_ms']['p95']} -> {result['latency_ms']['p95']} ms")
+    return regressions
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="端點性能基準測試")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--students", type=int, help="覆蓋預設規模的學生數")
+    parser.add_argument("--courses", type=int, help="覆蓋預設規模的課程數")
+    parser.add_argument("--db", type=Path, help="基準數據庫文件，默認 data/bench_<規模>.db")
+    parser.add_argument("--reseed", action="store_true", help="重新生成基準數據")
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn 模式下的工作進程數")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=10.0, help="每個場景的持續時間（秒）")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, default=BASE_DIR / "bench_output.json")
+    parser.add_argument("--baseline", type=Path, help="用於比較的基準結果文件")
+    parser.add_argument("--threshold", type=float, default=0.10, help="允許的性能回退比例")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    students, courses, per_student = SCALES[args.scale]
+    students = args.students or students
+    courses = args.courses or courses
+    db_path = (args.db or BASE_DIR / "data" / f"bench_{args.scale}.db").resolve()
+
+    # 必須在導入應用模塊之前設置，使應用與子進程連接到基準數據庫
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    prepare_database(db_path, students, courses, per_student, args.reseed, args.seed)
+
+    scenarios = asyncio.run(run_all(args, Dataset(students, courses)))
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "scale": args.scale,
+            "students": students,
+            "courses": courses,
+            "mode": args.mode,
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "env": {key: os.environ[key] for key in sorted(os.environ) if key.startswith(("DB_", "SQLITE_", "COURSE_CACHE"))},
+        },
+        "scenarios": scenarios,
+    }
+    args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+    print(f"結果已寫入 {args.output}")
+
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.threshold)
+        if regressions:
+            print("檢測到性能回退：")
+            for item in regressions:
+                print(f"  {item}")
+            return 1
+        print(f"與基準相比未超出 {args.threshold:.0%} 的回退閾值")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,8 +10,7 @@ echo "Python path: $PYTHONPATH"
 echo "Files in current directory:"
 ls -la
 
-# 初始化數據庫
-python -c "from app.db.init_db import init_db; init_db()"
+# 數據庫由應用的 lifespan 初始化，結構指紋一致時直接跳過建表
 
-# 啟動應用
-exec uvicorn app.main:app --host 0.0.0.0 --port 8000 "$@" 
\ No newline at end of file
+# 啟動應用，WEB_CONCURRENCY 設置工作進程數（默認 1）
+exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers "${WEB_CONCURRENCY:-1}" "$@" 
\ No newline at end of file